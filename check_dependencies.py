@@ -1,80 +1,115 @@
+import logging
 import os
+import stat
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
 
-def check_file_permissions(file_path):
-    if not os.access(file_path, os.R_OK):
+
+# Caminhos dos arquivos essenciais, montados uma única vez no carregamento
+MESHROOM_PATH = Path("src/Framework")
+ESSENTIAL_FILES = {
+    file: MESHROOM_PATH / file
+    for file in (
+        "share/aliceVision/vlfeat_K80L3.SIFT.tree",
+        "share/aliceVision/cameraSensors.db",
+        "share/aliceVision/config.ocio",
+        "aliceVision/bin/aliceVision_cameraInit",
+        "aliceVision/bin/aliceVision_featureExtraction",
+        "aliceVision/bin/aliceVision_imageMatching",
+    )
+}
+
+
+def check_file_permissions(st):
+    # Usa o modo já obtido pelo os.stat em vez de um os.access extra
+    if not st.st_mode & stat.S_IRUSR:
         return False, "sem permissão de leitura"
     return True, "OK"
 
 
+def probe_file(file_path):
+    try:
+        return os.stat(file_path)
+    except FileNotFoundError:
+        return None
+
+
 def check_alicevision_dependencies():
     # Verifica se o Meshroom está instalado no local correto
-    meshroom_path = Path("src/Framework")
-    if not meshroom_path.exists():
-        print("❌ Meshroom não encontrado em src/Framework")
+    if not MESHROOM_PATH.exists():
+        logger.error("❌ Meshroom não encontrado em src/Framework")
         return False
 
-    # Verifica arquivos essenciais
-    essential_files = [
-        "share/aliceVision/vlfeat_K80L3.SIFT.tree",
-        "share/aliceVision/cameraSensors.db",
-        "share/aliceVision/config.ocio",
-        "aliceVision/bin/aliceVision_cameraInit",
-        "aliceVision/bin/aliceVision_featureExtraction",
-        "aliceVision/bin/aliceVision_imageMatching",
-    ]
+    # Verifica arquivos essenciais com um único os.stat por arquivo
+    # (existência, permissão e tamanho), em paralelo já que são independentes
+    with ThreadPoolExecutor(max_workers=len(ESSENTIAL_FILES)) as executor:
+        results = dict(
+            zip(ESSENTIAL_FILES, executor.map(probe_file, ESSENTIAL_FILES.values()))
+        )
 
     missing_files = []
-    for file in essential_files:
-        file_path = meshroom_path / file
-        if not file_path.exists():
+    for file, st in results.items():
+        if st is None:
             missing_files.append(file)
-            print(f"❌ Arquivo não encontrado: {file}")
+            logger.error("❌ Arquivo não encontrado: %s", file)
         else:
-            can_read, status = check_file_permissions(file_path)
+            can_read, status = check_file_permissions(st)
             if can_read:
-                print(f"✅ Arquivo encontrado: {file} ({status})")
+                logger.info("✅ Arquivo encontrado: %s (%s)", file, status)
 
                 # Verifica tamanho do arquivo tree
-                if "vlfeat_K80L3.SIFT.tree" in str(file_path):
-                    size = os.path.getsize(file_path)
-                    print(f"   📊 Tamanho do arquivo tree: {size/1024/1024:.2f} MB")
+                if "vlfeat_K80L3.SIFT.tree" in file:
+                    size = st.st_size
+                    logger.info(
+                        "   📊 Tamanho do arquivo tree: %.2f MB", size / 1024 / 1024
+                    )
             else:
-                print(f"⚠️  Arquivo encontrado mas {status}: {file}")
+                logger.warning("⚠️  Arquivo encontrado mas %s: %s", status, file)
                 missing_files.append(f"{file} ({status})")
 
     # Verifica se OpenCV está instalado
     try:
         import cv2
 
-        print("✅ OpenCV está instalado")
+        logger.info("✅ OpenCV está instalado")
+    except ImportError:
+        logger.error("❌ OpenCV não está instalado")
+        missing_files.append("opencv-python-headless")
+
+    # Verifica se o PyAV, usado na decodificação dos vídeos, está instalado
+    try:
+        import av
+
+        logger.info("✅ PyAV está instalado")
     except ImportError:
-        print("❌ OpenCV não está instalado")
-        missing_files.append("opencv-python")
+        logger.error("❌ PyAV não está instalado")
+        missing_files.append("av")
 
     # Verifica variáveis de ambiente
     env_vars = ["LD_LIBRARY_PATH", "ALICEVISION_ROOT", "ALICEVISION_SHARE"]
 
-    print("\nVariáveis de ambiente:")
+    logger.info("\nVariáveis de ambiente:")
     for var in env_vars:
         value = os.environ.get(var)
         if value:
-            print(f"✅ {var}={value}")
+            logger.info("✅ %s=%s", var, value)
         else:
-            print(f"❌ {var} não definida")
+            logger.error("❌ %s não definida", var)
             missing_files.append(f"Variável de ambiente: {var}")
 
     if missing_files:
-        print("\nArquivos/pacotes/variáveis faltando:")
+        logger.error("\nArquivos/pacotes/variáveis faltando:")
         for file in missing_files:
-            print(f"- {file}")
+            logger.error("- %s", file)
         return False
 
-    print("\n✅ Todas as dependências estão instaladas!")
+    logger.info("\n✅ Todas as dependências estão instaladas!")
     return True
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     check_alicevision_dependencies()
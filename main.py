@@ -1,3 +1,5 @@
+import logging
+
 from converter.services.export_img import VideoFrameExtractor
 from object_values.type_videos import TypeVideos
 from setup_env import setup_environment
@@ -18,4 +20,5 @@ def main():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     main()
@@ -0,0 +1,37 @@
+-- Converte bancos criados antes do status em enum e dos ids em CHAR(32).
+-- Ids antigos no formato str(uuid4()) (36 caracteres, com hífens) viram o
+-- hexadecimal de 32 caracteres gerado hoje por uuid4().hex.
+--
+-- Uso: psql "$DATABASE_URL" -f migrations/0001_converter_status_enum_and_char32_ids.sql
+
+BEGIN;
+
+UPDATE pets SET id = replace(id, '-', '') WHERE length(id) = 36;
+UPDATE converters SET id = replace(id, '-', '') WHERE length(id) = 36;
+
+ALTER TABLE pets ALTER COLUMN id TYPE CHAR(32);
+ALTER TABLE converters ALTER COLUMN id TYPE CHAR(32);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'converter_status') THEN
+        CREATE TYPE converter_status AS ENUM ('processing', 'finalizado', 'error');
+    END IF;
+END
+$$;
+
+-- Status fora dos valores conhecidos impediriam a conversão para o enum
+UPDATE converters SET status = 'error'
+WHERE status NOT IN ('processing', 'finalizado', 'error');
+
+ALTER TABLE converters ALTER COLUMN status DROP DEFAULT;
+ALTER TABLE converters
+    ALTER COLUMN status TYPE converter_status USING status::converter_status;
+
+-- Índices declarados em entity.py; o create_all não os cria em tabelas que já
+-- existem. O predicado usa o valor gravado no enum, em minúsculas
+CREATE INDEX IF NOT EXISTS ix_pets_name ON pets (name);
+CREATE INDEX IF NOT EXISTS ix_converter_status_processing ON converters (status)
+    WHERE status = 'processing';
+
+COMMIT;
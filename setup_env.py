@@ -1,9 +1,15 @@
+import functools
+import logging
 import os
 from pathlib import Path
 import shutil
 
+logger = logging.getLogger(__name__)
 
-def setup_environment():
+
+@functools.lru_cache(maxsize=1)
+def _prepare_environment():
+    """Ajusta permissões e calcula as variáveis do AliceVision (uma vez por processo)"""
     # Obtém o caminho absoluto do diretório raiz do projeto
     project_root = Path(__file__).parent.absolute()
 
@@ -21,25 +27,32 @@ def setup_environment():
     ]
 
     for file in essential_files:
-        if file.exists():
-            # Garante permissões de leitura para o arquivo
+        try:
+            st = os.stat(file)
+        except FileNotFoundError:
+            logger.error("❌ Arquivo não encontrado: %s", file)
+            continue
+        # Garante permissões de leitura para o arquivo
+        if (st.st_mode & 0o777) != 0o644:
             os.chmod(file, 0o644)
-            print(f"✅ Permissões ajustadas para: {file}")
-        else:
-            print(f"❌ Arquivo não encontrado: {file}")
+            logger.info("✅ Permissões ajustadas para: %s", file)
 
     # Garante permissões de execução para binários
     if alicevision_bin.exists():
-        for binary in alicevision_bin.glob("*"):
-            if binary.is_file():
-                os.chmod(binary, 0o755)
-                print(f"✅ Permissões de execução ajustadas para: {binary}")
+        # os.scandir reaproveita o tipo retornado pela leitura do diretório
+        with os.scandir(alicevision_bin) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                # Só acrescenta os bits de execução que faltam, preservando os demais
+                mode = entry.stat(follow_symlinks=False).st_mode & 0o777
+                if mode & 0o111 != 0o111:
+                    os.chmod(entry.path, mode | 0o111)
+                    logger.info(
+                        "✅ Permissões de execução ajustadas para: %s", entry.path
+                    )
 
-    # Configura as variáveis de ambiente
-    os.environ["ALICEVISION_ROOT"] = str(alicevision_root)
-    os.environ["ALICEVISION_SHARE"] = str(alicevision_share)
-
-    # Atualiza LD_LIBRARY_PATH
+    # Calcula LD_LIBRARY_PATH
     lib_paths = [
         str(alicevision_lib),
         "/usr/lib",
@@ -49,22 +62,39 @@ def setup_environment():
     ]
 
     if "LD_LIBRARY_PATH" in os.environ:
-        lib_paths.append(os.environ["LD_LIBRARY_PATH"])
-
-    os.environ["LD_LIBRARY_PATH"] = ":".join(lib_paths)
+        lib_paths.extend(os.environ["LD_LIBRARY_PATH"].split(":"))
 
-    # Configura OCIO
-    os.environ["OCIO"] = str(alicevision_share / "config.ocio")
+    # Remove entradas repetidas (o linker percorre cada uma em todo dlopen)
+    seen = set()
+    unique_lib_paths = []
+    for path in lib_paths:
+        if not path:
+            continue
+        resolved = str(Path(path).resolve())
+        if resolved not in seen:
+            seen.add(resolved)
+            unique_lib_paths.append(resolved)
 
     return {
-        "ALICEVISION_ROOT": os.environ["ALICEVISION_ROOT"],
-        "ALICEVISION_SHARE": os.environ["ALICEVISION_SHARE"],
-        "LD_LIBRARY_PATH": os.environ["LD_LIBRARY_PATH"],
-        "OCIO": os.environ["OCIO"],
+        "ALICEVISION_ROOT": str(alicevision_root),
+        "ALICEVISION_SHARE": str(alicevision_share),
+        "LD_LIBRARY_PATH": ":".join(unique_lib_paths),
+        # Configura OCIO
+        "OCIO": str(alicevision_share / "config.ocio"),
     }
 
 
+def setup_environment():
+    # Reaplicar o dicionário em cache é idempotente: chamadas repetidas
+    # (ex.: a cada tarefa do Celery) não refazem a varredura nem duplicam
+    # entradas em LD_LIBRARY_PATH
+    env_vars = _prepare_environment()
+    os.environ.update(env_vars)
+    return dict(env_vars)
+
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     env_vars = setup_environment()
     print("\nVariáveis de ambiente configuradas:")
     for key, value in env_vars.items():
@@ -1,6 +1,19 @@
+import logging
+
 from celery import Celery
+from kombu.serialization import register
+import orjson
 import os
 
+# Serializador JSON baseado em orjson, usado para decodificar mensagens json
+register(
+    "orjson",
+    orjson.dumps,
+    orjson.loads,
+    content_type="application/json",
+    content_encoding="utf-8",
+)
+
 # Configuração direta em vez de importar app
 celery = Celery(
     "converter",
@@ -10,9 +23,11 @@ celery = Celery(
 
 # Configurações adicionais se necessário
 celery.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
+    # msgpack gera payloads menores e mais rápidos de codificar;
+    # json (via orjson) continua aceito para mensagens já enfileiradas
+    task_serializer="msgpack",
+    accept_content=["msgpack", "orjson"],
+    result_serializer="msgpack",
     timezone="UTC",
     enable_utc=True,
     broker_connection_retry_on_startup=True,
@@ -20,3 +35,6 @@ celery.conf.update(
 
 # Inclua os módulos que contêm tarefas
 celery.autodiscover_tasks(["converter"])
+
+# Nível de log dos módulos do projeto: INFO em produção, DEBUG em desenvolvimento
+logging.getLogger("converter").setLevel(os.environ.get("LOG_LEVEL", "INFO"))
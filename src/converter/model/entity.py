@@ -1,14 +1,16 @@
 import uuid
-from sqlalchemy import Column, String
+from sqlalchemy import CHAR, Column, Enum, Index, String, text
 
 from database import Base
+from object_values.status_video import StatusVideo
 
 
 
 class Pet(Base):
     __tablename__ = "pets"
+    __table_args__ = (Index("ix_pets_name", "name"),)
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(CHAR(32), primary_key=True, default=lambda: uuid.uuid4().hex)
     name = Column(String, nullable=False)
     pet_type = Column(String, nullable=False)
     affected_limb = Column(String, nullable=False)
@@ -16,10 +18,26 @@ class Pet(Base):
 
 class Converter(Base):
     __tablename__ = "converters"
-
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    # Índice parcial: só as conversões em andamento são consultadas com frequência
+    __table_args__ = (
+        Index(
+            "ix_converter_status_processing",
+            "status",
+            postgresql_where=text("status = 'processing'"),
+        ),
+    )
+
+    id = Column(CHAR(32), primary_key=True, default=lambda: uuid.uuid4().hex)
     name = Column(String, nullable=False)
     path_image = Column(String, nullable=True)
     path_video = Column(String, nullable=False)
     path_obj = Column(String, nullable=True)
-    status = Column(String, nullable=False, default="processing")
+    status = Column(
+        Enum(
+            StatusVideo,
+            name="converter_status",
+            values_callable=lambda enum: [member.value for member in enum],
+        ),
+        nullable=False,
+        default=StatusVideo.PROCESSING,
+    )
@@ -1,9 +1,8 @@
 import uuid
-from uuid import UUID
 from pydantic import BaseModel, Field
 
 class Pet(BaseModel):
-    id: UUID = Field(default_factory=uuid.uuid4)
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     name: str
     pet_type: str
-    affected_limb: str 
\ No newline at end of file
+    affected_limb: str
\ No newline at end of file
@@ -1,15 +1,18 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Form
+from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Form, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Optional
 import os
+import shutil
 from uuid import uuid4
 from sqlalchemy.orm import Session
 
 from converter.services.export_img import VideoFrameExtractor
 from object_values.type_videos import TypeVideos
+from object_values.status_video import StatusVideo
 from celery_app import celery
 from database import get_db
-from converter.services.video_service import update_video_status, create_pet
+from converter.services.video_service import update_video_status
 from converter.model.entity import Pet, Converter
 from converter.tasks import process_video
 
@@ -29,42 +32,68 @@ class VideoResponse(BaseModel):
     model_3d_url: Optional[str] = None
 
 
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+
+def _save_upload(video_file: UploadFile, file_path: str) -> None:
+    fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, 0o644)
+    # Pré-aloca o arquivo quando o tamanho é conhecido (menos fragmentação)
+    if video_file.size and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, video_file.size)
+        except OSError:
+            pass
+    # Copia em blocos para não manter o vídeo inteiro em memória
+    with os.fdopen(fd, "wb", buffering=UPLOAD_CHUNK_SIZE) as buffer:
+        shutil.copyfileobj(video_file.file, buffer, UPLOAD_CHUNK_SIZE)
+
+
+def _persist(db: Session, pet: Pet, converter: Converter) -> None:
+    # Pet e converter são gravados em uma única transação, fora do event loop
+    with db.begin():
+        db.add_all([pet, converter])
+
+
 @router.post("/", response_model=VideoResponse)
 async def upload_video(
+    request: Request,
     pet_name: str = Form(...),
     pet_type: str = Form(...),
     affected_limb: str = Form(...),
     video_file: UploadFile = File(...),
+    db: Session = Depends(get_db),
 ):
-    video_id = str(uuid4())
+    video_id = uuid4().hex
     video_path = f"src/tmp/uploads/{video_id}"
     os.makedirs(video_path, exist_ok=True)
 
     file_path = os.path.join(video_path, f"{pet_name}.MOV")
-    with open(file_path, "wb") as buffer:
-        content = await video_file.read()
-        buffer.write(content)
+    await run_in_threadpool(_save_upload, video_file, file_path)
     # Cria um novo pet no banco de dados usando o modelo SQLAlchemy
     pet = Pet(name=pet_name, pet_type=pet_type, affected_limb=affected_limb)
     # Também cria um registro na tabela converters
     converter = Converter(
-        id=video_id, name=pet_name, path_video=file_path, status="processing"
+        id=video_id,
+        name=pet_name,
+        path_video=file_path,
+        status=StatusVideo.PROCESSING,
     )
-    db: Session = next(get_db())
-    create_pet(db, pet)
-    db.add(converter)
-    db.commit()
+    await run_in_threadpool(_persist, db, pet, converter)
     # Envia a tarefa para a fila usando o novo caminho
-    process_video.delay(video_id, video_path, pet_name)
+    # reaproveitando o producer aberto na inicialização da aplicação
+    process_video.apply_async(
+        (video_id, video_path, pet_name),
+        producer=request.app.state.celery_producer,
+    )
 
-    return VideoResponse(id=video_id, status="processing", progress=0)
+    return VideoResponse(id=video_id, status=StatusVideo.PROCESSING.value, progress=0)
 
 
 @router.get("/{video_id}/status", response_model=VideoResponse)
 async def get_video_status(video_id: str):
     return VideoResponse(
         id=video_id,
-        status="processing",
+        status=StatusVideo.PROCESSING.value,
         progress=50,
     )
 
@@ -1,13 +1,237 @@
+import fcntl
+import functools
+import hashlib
+import io
+import logging
 import os
+import queue
+import shutil
+import stat
 import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+import ijson
+import numpy as np
+import orjson
 import requests
-import json
-from dataclasses import dataclass
-from typing import List, Optional, Union
+from requests.adapters import HTTPAdapter
+from collections import deque, namedtuple
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import List, Mapping, Optional, Union
 from pathlib import Path
 
 from abc import ABC, abstractmethod
 
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+COMMAND_OUTPUT_TAIL = 500  # linhas mantidas para relatar falhas
+DEBUG_DUMP_MAX_BYTES = 1_000_000  # arquivos maiores não são copiados no log
+DOWNLOAD_ATTEMPTS = 3  # tentativas por arquivo, com espera exponencial
+DOWNLOAD_RANGE_PARTS = 4  # conexões simultâneas por arquivo grande
+DOWNLOAD_RANGED_MIN_SIZE = 32 << 20  # 32 MiB
+# Memória de pico estimada por processo das etapas divididas em intervalos,
+# usada para limitar quantos rodam ao mesmo tempo
+DEPTH_MAP_WORKER_MEMORY = 4 << 30  # 4 GiB
+# Vistas por bloco das etapas divididas em intervalos. O tamanho é fixo, e não
+# derivado do número de workers, para que os blocos e seus carimbos de cache
+# sejam os mesmos em toda execução com as mesmas vistas
+RANGE_SIZE = 10
+FEATURE_EXTRACTION_WORKER_MEMORY = 1 << 30  # 1 GiB
+# Binários usados pelo pipeline, validados antes da primeira etapa
+PIPELINE_BINARIES = (
+    "aliceVision_cameraInit",
+    "aliceVision_featureExtraction",
+    "aliceVision_featureMatching",
+    "aliceVision_incrementalSfM",
+    "aliceVision_prepareDenseScene",
+    "aliceVision_depthMapEstimation",
+    "aliceVision_depthMapFiltering",
+    "aliceVision_meshing",
+    "aliceVision_meshFiltering",
+    "aliceVision_texturing",
+)
+# Extensões (sem o ponto, em minúsculas) aceitas como imagens de entrada
+IMAGE_EXTENSIONS = frozenset(("png", "jpg", "jpeg"))
+OCIO_CONFIG = """ocio_profile_version: 2
+
+search_path: ""
+strictparsing: true
+luma: [0.2126, 0.7152, 0.0722]
+
+roles:
+  default: raw
+  scene_linear: raw
+
+displays:
+  sRGB:
+    - !<View> {name: Raw, colorspace: raw}
+
+colorspaces:
+  - !<ColorSpace>
+    name: raw
+    family: raw
+    equalitygroup: ""
+    bitdepth: 32f
+    isdata: false
+    allocation: uniform"""
+# nome -> (url, sha256 esperado). As URLs apontam para uma tag, e não para um
+# branch, para que o conteúdo baixado não mude, e um download das URLs padrão
+# só é aceito com o digest fixado aqui
+ESSENTIAL_FILES_REVISION = "v3.2.0"
+# Espelho opcional dos arquivos essenciais, baixados de <espelho>/<nome>. Só
+# para ele, sem digest fixado, o do primeiro download é gravado em
+# <nome>.sha256 no cache e exigido dali em diante
+ESSENTIAL_FILES_MIRROR_ENV = "ALICEVISION_ESSENTIAL_FILES_MIRROR"
+ESSENTIAL_FILES = {
+    "cameraSensors.db": (
+        "https://github.com/alicevision/AliceVision/raw/"
+        f"{ESSENTIAL_FILES_REVISION}/src/aliceVision/sensorDB/cameraSensors.db",
+        None,
+    ),
+    "vlfeat_K80L3.SIFT.tree": (
+        "https://github.com/alicevision/AliceVision/raw/"
+        f"{ESSENTIAL_FILES_REVISION}/src/aliceVision/voctree/vlfeat_K80L3.SIFT.tree",
+        None,
+    ),
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _http_session() -> requests.Session:
+    """Sessão HTTP compartilhada: reaproveita conexões TLS entre downloads"""
+    session = requests.Session()
+    # Uma conexão por intervalo de cada arquivo baixado em paralelo
+    adapter = HTTPAdapter(
+        pool_connections=len(ESSENTIAL_FILES),
+        pool_maxsize=len(ESSENTIAL_FILES) * DOWNLOAD_RANGE_PARTS,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _essential_cache_dir() -> Path:
+    """Diretório persistente, compartilhado entre instalações, dos arquivos essenciais"""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "alicevision"
+
+
+AliceVisionProbe = namedtuple("AliceVisionProbe", ["bin_ok", "lib_ok", "libs", "bins"])
+
+
+@functools.lru_cache(maxsize=32)
+def _probe_alicevision(bin_path: Path, lib_path: Path) -> AliceVisionProbe:
+    """Verifica a instalação do AliceVision uma única vez por par de caminhos"""
+    bin_ok = bin_path.is_dir()
+    lib_ok = lib_path.is_dir()
+    # Binários executáveis indexados por nome, em uma única varredura
+    bins = {}
+    if bin_ok:
+        with os.scandir(bin_path) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.stat().st_mode & stat.S_IXUSR:
+                    bins[entry.name] = entry.path
+    libs = ()
+    if lib_ok:
+        with os.scandir(lib_path) as entries:
+            libs = tuple(sorted(entry.name for entry in entries))
+    return AliceVisionProbe(bin_ok, lib_ok, libs, MappingProxyType(bins))
+
+
+@functools.lru_cache(maxsize=32)
+def _existing_dirs(paths: tuple) -> tuple:
+    """Filtra os diretórios existentes uma única vez por conjunto de candidatos"""
+    return tuple(path for path in paths if os.path.isdir(path))
+
+
+def _split_cpus(parts: int) -> List[Optional[frozenset]]:
+    """Divide as CPUs disponíveis em conjuntos contíguos e disjuntos, um por
+    processo; sem CPUs suficientes (ou fora do Linux) não fixa afinidade"""
+    if not hasattr(os, "sched_getaffinity"):
+        return [None] * parts
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < parts:
+        return [None] * parts
+    return [
+        frozenset(cpus[i * len(cpus) // parts : (i + 1) * len(cpus) // parts])
+        for i in range(parts)
+    ]
+
+
+def _atomic_write(path: Path, data: str) -> None:
+    """Grava em um arquivo temporário no mesmo diretório e o publica com os.replace,
+    para que uma falha no meio da escrita não deixe um arquivo truncado"""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        # mkstemp cria com 0600; mantém as permissões de um open() comum
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _file_sha256(path: Path) -> str:
+    """SHA-256 do conteúdo do arquivo, lido em blocos"""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _available_memory() -> Optional[int]:
+    """Memória disponível em bytes (MemAvailable no Linux), ou None se desconhecida"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _default_workers(worker_memory: int) -> int:
+    """Um processo por CPU, sem passar do que cabe na memória disponível"""
+    workers = os.cpu_count() or 1
+    memory = _available_memory()
+    if memory:
+        workers = min(workers, max(1, memory // worker_memory))
+    return workers
+
+
+@functools.lru_cache(maxsize=1)
+def _taskset_path() -> Optional[str]:
+    """Caminho do taskset (util-linux), procurado uma única vez"""
+    return shutil.which("taskset")
+
+
+@functools.lru_cache(maxsize=1)
+def _gpu_count() -> int:
+    """Conta as GPUs NVIDIA visíveis, consultando o nvidia-smi uma única vez"""
+    nvidia_smi = shutil.which("nvidia-smi")
+    if not nvidia_smi:
+        return 0
+    try:
+        result = subprocess.run(
+            [nvidia_smi, "-L"], capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return 0
+    return sum(1 for line in result.stdout.splitlines() if line.startswith("GPU "))
+
 
 class Processor(ABC):
     input_directory: Union[str, Path]
@@ -22,12 +246,30 @@ class Processor(ABC):
 class AliceVisionProcessor(Processor):
     input_directory: Union[str, Path]
     output_directory: Union[str, Path]
-    alicevision_bin_path: Union[str, Path] = os.environ.get(
-        "ALICEVISION_BIN_PATH",
-        "/home/pedro/dev/tcc/tcc/src/Framework/aliceVision/bin",
+    # Lido a cada instância, e não uma única vez na definição da classe
+    alicevision_bin_path: Union[str, Path] = field(
+        default_factory=lambda: os.environ.get(
+            "ALICEVISION_BIN_PATH",
+            "/home/pedro/dev/tcc/tcc/src/Framework/aliceVision/bin",
+        )
     )
     force_cpu: bool = True
     verbose: bool = True
+    max_parallel_steps: int = 2
+    # Resumo do conteúdo das imagens de entrada, calculado por quem as gravou;
+    # sem ele, o cache compara o tamanho e o mtime de cada imagem
+    input_digest: Optional[str] = None
+    # Processos simultâneos das etapas divididas em intervalos. O padrão, calculado
+    # a cada instância, é um por CPU limitado pela RAM disponível dividida pela
+    # memória estimada de cada processo; com GPUs, _run_in_ranges limita ainda
+    # a um processo por GPU. Só a concorrência muda: os blocos têm RANGE_SIZE
+    # vistas, qualquer que seja o número de workers
+    max_depth_map_workers: int = field(
+        default_factory=lambda: _default_workers(DEPTH_MAP_WORKER_MEMORY)
+    )
+    max_feature_extraction_workers: int = field(
+        default_factory=lambda: _default_workers(FEATURE_EXTRACTION_WORKER_MEMORY)
+    )
 
     def __post_init__(self):
         # Converte caminhos para Path caso sejam strings e garante o caminho absoluto
@@ -35,227 +277,770 @@ class AliceVisionProcessor(Processor):
         self.output_directory = Path(self.output_directory).absolute()
         self.alicevision_bin_path = Path(self.alicevision_bin_path).absolute()
 
+        # Configurar diretórios usando Path
+        self.alicevision_root = self.alicevision_bin_path.parent.parent
+        self.alicevision_lib_path = self.alicevision_bin_path.parent / "lib"
+
+        # Sondagem do sistema de arquivos compartilhada entre instâncias
+        probe = _probe_alicevision(self.alicevision_bin_path, self.alicevision_lib_path)
+
         # Verificar se o diretório dos binários existe
-        if not self.alicevision_bin_path.exists():
+        if not probe.bin_ok:
             raise ValueError(
                 f"O diretório de binários AliceVision não existe: {self.alicevision_bin_path}"
             )
 
-        # Configurar diretórios usando Path
-        self.alicevision_root = self.alicevision_bin_path.parent.parent
-        self.alicevision_lib_path = self.alicevision_bin_path.parent / "lib"
-
         # Configurar diretório share e arquivo OCIO usando Path
         self.alicevision_share = self.alicevision_root / "share" / "aliceVision"
         self.alicevision_share.mkdir(parents=True, exist_ok=True)
+        # Uma única listagem do diretório share atende a todas as verificações
+        with os.scandir(self.alicevision_share) as entries:
+            share_files = frozenset(entry.name for entry in entries)
 
         self.ocio_path = self.alicevision_share / "config.ocio"
-        if not self.ocio_path.exists():
-            with open(self.ocio_path, "w") as f:
-                f.write(
-                    """ocio_profile_version: 2
-
-search_path: ""
-strictparsing: true
-luma: [0.2126, 0.7152, 0.0722]
-
-roles:
-  default: raw
-  scene_linear: raw
-
-displays:
-  sRGB:
-    - !<View> {name: Raw, colorspace: raw}
-
-colorspaces:
-  - !<ColorSpace>
-    name: raw
-    family: raw
-    equalitygroup: ""
-    bitdepth: 32f
-    isdata: false
-    allocation: uniform"""
-                )
+        # os.replace: construções concorrentes nunca expõem um arquivo parcial
+        if self.ocio_path.name not in share_files:
+            _atomic_write(self.ocio_path, OCIO_CONFIG)
 
         # Verificar se as bibliotecas existem
-        if not os.path.exists(self.alicevision_lib_path):
+        if not probe.lib_ok:
             raise ValueError(
                 f"Diretório de bibliotecas não encontrado: {self.alicevision_lib_path}"
             )
+        self.alicevision_libs = probe.libs
+        self.alicevision_bins = probe.bins
+        # Falhar na construção se algum binário do pipeline estiver ausente
+        if not self.verify():
+            raise ValueError(
+                f"Instalação AliceVision incompleta em: {self.alicevision_bin_path}"
+            )
 
-        # Listar bibliotecas disponíveis para debug
-        print("Bibliotecas disponíveis no diretório lib:")
-        for lib in sorted(os.listdir(self.alicevision_lib_path)):
-            print(f"  - {lib}")
+        # Verificar se há ao menos uma biblioteca do AliceVision
+        alicevision_lib = next(
+            (lib for lib in probe.libs if lib.startswith("libaliceVision")), None
+        )
+        if alicevision_lib:
+            if self.verbose:
+                logger.info("Biblioteca AliceVision encontrada: %s", alicevision_lib)
+        else:
+            logger.warning(
+                "Aviso: nenhuma biblioteca libaliceVision em: %s",
+                self.alicevision_lib_path,
+            )
 
-        print(f"Usando AliceVision em: {self.alicevision_bin_path}")
-        print(f"Diretório de entrada: {self.input_directory}")
-        print(f"Diretório de saída: {self.output_directory}")
-        print(f"Arquivo OCIO: {self.ocio_path}")
+        self._child_env = self._build_child_env()
+        # Subprocessos em execução, encerrados se uma etapa paralela falhar
+        self._live_processes = set()
+        self._live_lock = threading.Lock()
+        # Caminhos já confirmados nesta execução, sem novo stat a cada etapa
+        self._produced = set()
+        if self.verbose:
+            for name in (
+                "LD_LIBRARY_PATH",
+                "ALICEVISION_ROOT",
+                "ALICEVISION_SHARE",
+                "OCIO",
+            ):
+                logger.info("Com %s: %s", name, self._child_env[name])
 
-        # Verificar e criar arquivos essenciais
-        essential_files = {
-            "cameraSensors.db": "https://github.com/alicevision/AliceVision/raw/develop/src/aliceVision/sensorDB/cameraSensors.db",
-            "vlfeat_K80L3.SIFT.tree": "https://github.com/alicevision/AliceVision/raw/develop/src/aliceVision/voctree/vlfeat_K80L3.SIFT.tree",
+        # Caminhos usados pelas etapas do pipeline, calculados uma única vez
+        self.sensor_db = self.alicevision_share / "cameraSensors.db"
+        self.tree_file = self.alicevision_share / "vlfeat_K80L3.SIFT.tree"
+        self.cache_dir = self.output_directory / "cache"
+        self.images_list = self.cache_dir / "images.txt"
+        self.stamps_dir = self.cache_dir / "stamps"
+        self.init_sfm_file = self.cache_dir / "sfm.json"
+        self.features_dir = self.cache_dir / "features"
+        self.matches_dir = self.cache_dir / "matches"
+        self.image_pairs_file = self.matches_dir / "image_pairs.txt"
+        self.sfm_dir = self.cache_dir / "sfm"
+        self.sfm_file = self.sfm_dir / "sfm.json"
+        self.mvs_dir = self.cache_dir / "mvsData"
+        self.mvs_sfm_file = self.mvs_dir / "sfm.json"
+        self.depth_map_dir = self.cache_dir / "depthMap"
+        self.depth_map_filtered_dir = self.cache_dir / "depthMap_filtered"
+        self.mesh_file = self.cache_dir / "mesh.obj"
+        self.mesh_filtered_file = self.cache_dir / "mesh_filtered.obj"
+        self.textured_model_dir = self.output_directory / "textured_model"
+
+        logger.info("Usando AliceVision em: %s", self.alicevision_bin_path)
+        logger.info("Diretório de entrada: %s", self.input_directory)
+        logger.info("Diretório de saída: %s", self.output_directory)
+        logger.info("Arquivo OCIO: %s", self.ocio_path)
+
+        # Verificar e baixar arquivos essenciais em paralelo; o download vai para
+        # o cache do usuário e o share recebe apenas um link para ele
+        self.essential_cache_dir = _essential_cache_dir()
+        self.essential_mirror = os.environ.get(ESSENTIAL_FILES_MIRROR_ENV)
+        # os.path.exists segue o link: um link cujo alvo sumiu do cache conta
+        # como ausente e é refeito
+        missing_files = {
+            file_name: source
+            for file_name, source in ESSENTIAL_FILES.items()
+            if file_name not in share_files
+            or not os.path.exists(self.alicevision_share / file_name)
         }
+        if missing_files:
+            self.essential_cache_dir.mkdir(parents=True, exist_ok=True)
+            with ThreadPoolExecutor(max_workers=len(missing_files)) as executor:
+                for file_name, (url, sha256) in missing_files.items():
+                    if self.essential_mirror:
+                        url = f"{self.essential_mirror.rstrip('/')}/{file_name}"
+                    executor.submit(
+                        self._provide_essential_file, file_name, url, sha256
+                    )
 
-        for file_name, url in essential_files.items():
-            file_path = self.alicevision_share / file_name
-            if not file_path.exists():
-                print(f"Baixando arquivo essencial: {file_name}")
-                try:
-                    response = requests.get(url, timeout=10)
-                    with open(file_path, "wb") as f:
-                        f.write(response.content)
-                    print(f"Arquivo {file_name} baixado com sucesso.")
-                except Exception as download_error:
-                    print(f"Falha ao baixar {file_name}: {download_error}")
-                    print("O processo pode não funcionar corretamente.")
+    def _provide_essential_file(
+        self, file_name: str, url: str, sha256: Optional[str] = None
+    ) -> None:
+        """Liga o arquivo essencial do cache ao share, baixando-o se necessário"""
+        cached_path = self.essential_cache_dir / file_name
+        if not self._download_under_lock(file_name, url, sha256):
+            return
+        # O link novo substitui de uma vez um link quebrado que esteja no lugar,
+        # e instâncias concorrentes apenas gravam o mesmo link
+        link_path = self.alicevision_share / file_name
+        tmp_link = link_path.with_name(
+            f".{file_name}.{os.getpid()}.{threading.get_ident()}"
+        )
+        tmp_link.unlink(missing_ok=True)
+        tmp_link.symlink_to(cached_path)
+        os.replace(tmp_link, link_path)
+
+    def _cached_file_ok(self, file_name: str, sha256: Optional[str] = None) -> bool:
+        """Confere o arquivo do cache pelo digest esperado; uma cópia corrompida é
+        apagada para ser baixada de novo"""
+        cached_path = self.essential_cache_dir / file_name
+        if not cached_path.exists():
+            return False
+        expected = self._expected_digest(file_name, sha256)
+        if expected and _file_sha256(cached_path) != expected:
+            logger.warning(
+                "Arquivo %s corrompido no cache, baixando de novo", file_name
+            )
+            cached_path.unlink(missing_ok=True)
+            return False
+        return True
+
+    def _download_under_lock(
+        self, file_name: str, url: str, sha256: Optional[str] = None
+    ) -> bool:
+        """Baixa o arquivo sob trava exclusiva, uma única vez entre processos, se o
+        cache não tiver uma cópia íntegra"""
+        cached_path = self.essential_cache_dir / file_name
+        with open(cached_path.with_name(f"{file_name}.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # Outro processo pode ter concluído o download enquanto esperávamos;
+            # a conferência fica sob a trava para não apagar um download recém-publicado
+            if self._cached_file_ok(file_name, sha256):
+                return True
+            return self._download_essential_file(file_name, url, sha256)
+
+    def _download_essential_file(
+        self, file_name: str, url: str, sha256: Optional[str] = None
+    ) -> bool:
+        """Baixa um arquivo essencial, tentando novamente com espera exponencial"""
+        # Das URLs padrão, nem o primeiro download é aceito sem um digest fixado
+        if not self._expected_digest(file_name, sha256) and not self.essential_mirror:
+            logger.error(
+                "Sem SHA-256 fixado em ESSENTIAL_FILES para %s; download recusado",
+                file_name,
+            )
+            return False
+        logger.info("Baixando arquivo essencial: %s", file_name)
+        for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+            try:
+                self._fetch_essential_file(file_name, url, sha256)
+                logger.info("Arquivo %s baixado com sucesso.", file_name)
+                return True
+            except Exception as download_error:
+                logger.error(
+                    "Falha ao baixar %s (tentativa %s/%s): %s",
+                    file_name,
+                    attempt,
+                    DOWNLOAD_ATTEMPTS,
+                    download_error,
+                )
+                if attempt < DOWNLOAD_ATTEMPTS:
+                    time.sleep(2 ** (attempt - 1))
+        logger.warning("O processo pode não funcionar corretamente.")
+        return False
+
+    def _fetch_essential_file(
+        self, file_name: str, url: str, sha256: Optional[str]
+    ) -> None:
+        """Baixa o arquivo para um .part, em intervalos paralelos quando o servidor
+        permite ou em um único fluxo retomável, e o valida antes de publicá-lo"""
+        file_path = self.essential_cache_dir / file_name
+        partial_path = file_path.with_name(f"{file_name}.part")
+        etag_path = file_path.with_name(f"{file_name}.part.etag")
+        # Um .part existente só pode ser retomado pelo fluxo único
+        if partial_path.exists() or not self._fetch_in_ranges(url, partial_path):
+            self._fetch_stream(url, partial_path, etag_path)
+        digest = _file_sha256(partial_path)
+        expected = self._expected_digest(file_name, sha256)
+        if expected and digest != expected:
+            # Conteúdo corrompido não deve ser retomado na próxima tentativa
+            partial_path.unlink(missing_ok=True)
+            etag_path.unlink(missing_ok=True)
+            raise ValueError(f"SHA-256 inválido para {file_name}: {digest}")
+        logger.info("SHA-256 de %s: %s", file_name, digest)
+        if not expected:
+            if not self.essential_mirror:
+                partial_path.unlink(missing_ok=True)
+                etag_path.unlink(missing_ok=True)
+                raise ValueError(f"Sem SHA-256 fixado para {file_name}")
+            _atomic_write(self._digest_path(file_name), digest)
+        os.replace(partial_path, file_path)
+        etag_path.unlink(missing_ok=True)
+
+    def _digest_path(self, file_name: str) -> Path:
+        return self.essential_cache_dir / f"{file_name}.sha256"
+
+    def _expected_digest(self, file_name: str, sha256: Optional[str]) -> Optional[str]:
+        """Digest fixado em ESSENTIAL_FILES ou, sem ele e só com espelho, o do
+        primeiro download"""
+        if sha256 or not self.essential_mirror:
+            return sha256
+        try:
+            return self._digest_path(file_name).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _fetch_stream(self, url: str, partial_path: Path, etag_path: Path) -> None:
+        """Baixa em um único fluxo, continuando de onde o .part parou"""
+        downloaded = partial_path.stat().st_size if partial_path.exists() else 0
+        headers = {}
+        if downloaded:
+            headers["Range"] = f"bytes={downloaded}-"
+            # Só retoma se o arquivo remoto ainda for o mesmo do .part
+            if etag_path.exists():
+                headers["If-Range"] = etag_path.read_text().strip()
+        with _http_session().get(
+            url, headers=headers, stream=True, timeout=(5, 60)
+        ) as response:
+            # 416 para um .part que já cobre o arquivo inteiro: só falta validá-lo
+            if response.status_code == 416 and downloaded:
+                total = response.headers.get("Content-Range", "").rpartition("/")[2]
+                if total == str(downloaded):
+                    return
+                # Um .part maior que o arquivo remoto não pode ser retomado
+                partial_path.unlink(missing_ok=True)
+                etag_path.unlink(missing_ok=True)
+            response.raise_for_status()
+            etag = response.headers.get("ETag")
+            if etag:
+                etag_path.write_text(etag)
+            # Sem suporte a Range o servidor devolve o arquivo inteiro
+            mode = "ab" if response.status_code == 206 else "wb"
+            with open(partial_path, mode, buffering=DOWNLOAD_CHUNK_SIZE) as f:
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+
+    def _fetch_in_ranges(self, url: str, partial_path: Path) -> bool:
+        """Baixa arquivos grandes em intervalos simultâneos, um por conexão.
+        Retorna False, sem deixar .part, se o servidor não suportar Range"""
+        head = _http_session().head(url, allow_redirects=True, timeout=(5, 30))
+        size = int(head.headers.get("Content-Length", 0))
+        if (
+            head.status_code != 200
+            or head.headers.get("Accept-Ranges") != "bytes"
+            or "Content-Encoding" in head.headers
+            or size < DOWNLOAD_RANGED_MIN_SIZE
+        ):
+            return False
+        bounds = [
+            (
+                part * size // DOWNLOAD_RANGE_PARTS,
+                (part + 1) * size // DOWNLOAD_RANGE_PARTS - 1,
+            )
+            for part in range(DOWNLOAD_RANGE_PARTS)
+        ]
+        fd = os.open(partial_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            with ThreadPoolExecutor(max_workers=DOWNLOAD_RANGE_PARTS) as executor:
+                complete = all(
+                    executor.map(
+                        lambda bound: self._fetch_range(head.url, fd, *bound), bounds
+                    )
+                )
+        except BaseException:
+            # Um .part com lacunas não pode ser retomado como prefixo
+            os.close(fd)
+            partial_path.unlink(missing_ok=True)
+            raise
+        os.close(fd)
+        if not complete:
+            partial_path.unlink(missing_ok=True)
+        return complete
+
+    def _fetch_range(self, url: str, fd: int, start: int, end: int) -> bool:
+        """Grava o intervalo [start, end] no deslocamento correspondente do .part"""
+        headers = {"Range": f"bytes={start}-{end}", "Accept-Encoding": "identity"}
+        with _http_session().get(
+            url, headers=headers, stream=True, timeout=(5, 60)
+        ) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                return False
+            offset = start
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                os.pwrite(fd, chunk, offset)
+                offset += len(chunk)
+        return offset == end + 1
 
     def process_images(self) -> None:
         """Processa imagens usando AliceVision para criar modelo 3D"""
         try:
-            print("\n=== Iniciando pipeline de reconstrução 3D ===")
-            # Criar diretório de cache
-            cache_dir = Path(self.output_directory) / "cache"
-            cache_dir.mkdir(exist_ok=True)
-            # Pipeline completo do AliceVision
-            steps = [
-                (
+            logger.info("\n=== Iniciando pipeline de reconstrução 3D ===")
+            # Falhar cedo se não houver imagens
+            self._images = self._list_images()
+            self._produced = set()
+            # Criar de uma vez o diretório de cache e os subdiretórios que as
+            # etapas esperam encontrar; os demais são criados pelo AliceVision
+            self.cache_dir.mkdir(exist_ok=True)
+            for directory in (
+                self.stamps_dir,
+                self.features_dir,
+                self.matches_dir,
+                self.sfm_dir,
+            ):
+                directory.mkdir(exist_ok=True)
+            # Pipeline completo do AliceVision: nome -> (descrição, função, dependências)
+            steps = {
+                "camera_init": (
+                    "Inicialização das câmeras",
+                    self._run_camera_init,
+                    [],
+                ),
+                "feature_extraction": (
                     "Extração de características",
-                    lambda: self._run_feature_extraction(cache_dir),
+                    self._run_feature_extraction,
+                    ["camera_init"],
+                ),
+                "image_matching": (
+                    "Matching de imagens",
+                    self._run_image_matching,
+                    ["camera_init"],
                 ),
-                ("Matching de imagens", lambda: self._run_image_matching(cache_dir)),
-                (
+                "feature_matching": (
                     "Matching de características",
-                    lambda: self._run_feature_matching(cache_dir),
+                    self._run_feature_matching,
+                    ["feature_extraction", "image_matching"],
                 ),
-                (
+                "structure_from_motion": (
                     "Reconstrução da estrutura",
-                    lambda: self._run_structure_from_motion(cache_dir),
+                    self._run_structure_from_motion,
+                    ["feature_matching"],
                 ),
-                (
+                "prepare_dense_scene": (
                     "Preparação da cena densa",
-                    lambda: self._run_prepare_dense_scene(cache_dir),
+                    self._run_prepare_dense_scene,
+                    ["structure_from_motion"],
                 ),
-                (
+                "depth_map_estimation": (
                     "Estimativa de mapas de profundidade",
-                    lambda: self._run_depth_map_estimation(cache_dir),
+                    self._run_depth_map_estimation,
+                    ["prepare_dense_scene"],
                 ),
-                (
+                "depth_map_filter": (
                     "Filtragem de mapas de profundidade",
-                    lambda: self._run_depth_map_filter(cache_dir),
+                    self._run_depth_map_filter,
+                    ["depth_map_estimation"],
                 ),
-                ("Geração da malha", lambda: self._run_meshing(cache_dir)),
-                ("Filtragem da malha", lambda: self._run_mesh_filtering(cache_dir)),
-                ("Texturização", lambda: self._run_texturing(cache_dir)),
-            ]
-
-            total_steps = len(steps)
-            for i, (step_name, step_func) in enumerate(steps, 1):
-                print(f"\n[{i}/{total_steps}] {step_name}")
-                print("=" * (len(step_name) + 8))
-                step_func()
-                print(f"✓ {step_name} concluído")
+                "meshing": (
+                    "Geração da malha",
+                    self._run_meshing,
+                    ["depth_map_filter"],
+                ),
+                "mesh_filtering": (
+                    "Filtragem da malha",
+                    self._run_mesh_filtering,
+                    ["meshing"],
+                ),
+                "texturing": (
+                    "Texturização",
+                    self._run_texturing,
+                    ["mesh_filtering"],
+                ),
+            }
+            self._run_pipeline(steps)
 
-            print("\n=== Reconstrução 3D completada com sucesso! ===")
-            print(f"Modelo final salvo em: {self.output_directory}")
+            logger.info("\n=== Reconstrução 3D completada com sucesso! ===")
+            logger.info("Modelo final salvo em: %s", self.output_directory)
 
         except Exception as e:
-            print("\n❌ Erro durante o processamento AliceVision:")
-            print(f"   {str(e)}")
+            logger.error("\n❌ Erro durante o processamento AliceVision:")
+            logger.error("   %s", e)
             raise
 
+    def process_many(
+        self, dataset_dirs: List[Union[str, Path]], max_in_flight: int = 2
+    ) -> List[Path]:
+        """Processa vários conjuntos de imagens, sobrepondo até max_in_flight deles"""
+        # Cada conjunto usa uma cópia do processador com saída em um subdiretório
+        processors = [
+            replace(
+                self,
+                input_directory=dataset_dir,
+                output_directory=self.output_directory / Path(dataset_dir).name,
+                # O resumo fornecido vale só para as imagens de input_directory
+                input_digest=None,
+            )
+            for dataset_dir in dataset_dirs
+        ]
+        # O limite de workers evita manter muitas reconstruções em memória; a
+        # falha de um conjunto não interrompe os que já estão em andamento
+        failures = {}
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            futures = {
+                executor.submit(processor.process_images): processor
+                for processor in processors
+            }
+            for future in as_completed(futures):
+                dataset = futures[future].input_directory
+                try:
+                    future.result()
+                    logger.info("Conjunto %s concluído", dataset)
+                except Exception as e:
+                    failures[dataset] = e
+        if failures:
+            raise RuntimeError(
+                "Falha ao processar os conjuntos: "
+                + ", ".join(str(dataset) for dataset in failures)
+            ) from next(iter(failures.values()))
+        return [processor.output_directory for processor in processors]
+
+    def _run_pipeline(self, steps: dict) -> None:
+        """Executa as etapas respeitando as dependências, em paralelo quando possível"""
+        remaining_deps = {name: set(deps) for name, (_, _, deps) in steps.items()}
+        dependents = {name: [] for name in steps}
+        for name, (_, _, deps) in steps.items():
+            for dep in deps:
+                dependents[dep].append(name)
+
+        total_steps = len(steps)
+        started = 0
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_parallel_steps) as executor:
+
+            def start_ready_steps() -> None:
+                nonlocal started
+                ready = [name for name, deps in remaining_deps.items() if not deps]
+                for name in ready:
+                    del remaining_deps[name]
+                    step_name, step_func, _ = steps[name]
+                    started += 1
+                    logger.info("\n[%s/%s] %s", started, total_steps, step_name)
+                    logger.info("=" * (len(step_name) + 8))
+                    running[executor.submit(step_func)] = name
+
+            try:
+                start_ready_steps()
+                while running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        # Propaga o erro da etapa; as demais não são iniciadas
+                        future.result()
+                        logger.info("✓ %s concluído", steps[name][0])
+                        for dependent in dependents[name]:
+                            remaining_deps[dependent].discard(name)
+                    start_ready_steps()
+            except BaseException:
+                # Não espera as etapas irmãs terminarem para relatar a falha
+                self._terminate_running()
+                raise
+
     def _get_bin_path(self, binary_name: str) -> str:
         """Retorna o caminho completo para um binário do AliceVision"""
-        return str(Path(self.alicevision_bin_path) / binary_name)
+        try:
+            return self.alicevision_bins[binary_name]
+        except KeyError:
+            raise ValueError(
+                f"Binário AliceVision não encontrado ou sem permissão de execução: "
+                f"{self.alicevision_bin_path / binary_name}"
+            ) from None
 
-    def _run_command(self, cmd: List[str], env: Optional[dict] = None) -> None:
-        """Executa um comando do AliceVision com o ambiente configurado"""
-        print("\n📋 Executando comando:")
-        print(f"   {' '.join(cmd)}")
-        # Configurar ambiente
-        current_env = os.environ.copy()
-        if env:
-            current_env.update(env)
+    def _build_child_env(self) -> Mapping[str, str]:
+        """Monta uma única vez o ambiente usado pelos binários do AliceVision"""
+        child_env = os.environ.copy()
         # Forçar uso de CPU se necessário
         if self.force_cpu:
-            current_env["CUDA_VISIBLE_DEVICES"] = "-1"
-            current_env["ALICEVISION_USE_CUDA"] = "0"
-        # Configurar caminho das bibliotecas
-        lib_paths = [
-            str(self.alicevision_lib_path),
-            "/usr/lib",
-            "/usr/local/lib",
-            "/home/pedro/dev/tcc/src/Framework/lib",
-            "/home/pedro/dev/tcc/src/Framework/aliceVision/lib",
-        ]
-        current_env["LD_LIBRARY_PATH"] = (
-            ":".join([path for path in lib_paths if os.path.exists(path)])
-            + ":"
-            + current_env.get("LD_LIBRARY_PATH", "")
+            child_env["CUDA_VISIBLE_DEVICES"] = "-1"
+            child_env["ALICEVISION_USE_CUDA"] = "0"
+        # Configurar caminho das bibliotecas sem repetir entradas já presentes
+        lib_paths = _existing_dirs(
+            (
+                str(self.alicevision_lib_path),
+                "/usr/lib",
+                "/usr/local/lib",
+                "/home/pedro/dev/tcc/src/Framework/lib",
+                "/home/pedro/dev/tcc/src/Framework/aliceVision/lib",
+            )
         )
+        inherited = [p for p in child_env.get("LD_LIBRARY_PATH", "").split(":") if p]
+        lib_paths = [path for path in lib_paths if path not in inherited]
+        child_env["LD_LIBRARY_PATH"] = ":".join(lib_paths + inherited)
         # Configurar variáveis de ambiente do AliceVision
-        current_env["ALICEVISION_ROOT"] = str(self.alicevision_root)
-        current_env["ALICEVISION_SHARE"] = str(self.alicevision_share)
-        current_env["OCIO"] = str(self.ocio_path)
-        print(f"Com LD_LIBRARY_PATH: {current_env['LD_LIBRARY_PATH']}")
-        print(f"Com ALICEVISION_ROOT: {current_env['ALICEVISION_ROOT']}")
-        print(f"Com ALICEVISION_SHARE: {current_env['ALICEVISION_SHARE']}")
-        print(f"Com OCIO: {current_env['OCIO']}")
-        try:
-            result = subprocess.run(
-                cmd,
-                env=current_env,
-                check=True,
-                capture_output=True,
-                text=True,
+        child_env["ALICEVISION_ROOT"] = str(self.alicevision_root)
+        child_env["ALICEVISION_SHARE"] = str(self.alicevision_share)
+        child_env["OCIO"] = str(self.ocio_path)
+        # Somente leitura: o mesmo ambiente é compartilhado por todas as etapas
+        return MappingProxyType(child_env)
+
+    def _run_command(
+        self,
+        cmd: List[str],
+        env: Optional[dict] = None,
+        cpu_set: Optional[frozenset] = None,
+    ) -> None:
+        """Executa um comando do AliceVision com o ambiente configurado"""
+        logger.info("\n📋 Executando %s", os.path.basename(cmd[0]))
+        # A linha de comando completa só interessa no modo detalhado
+        if self.verbose:
+            logger.info("   %s", " ".join(cmd))
+        # Reutiliza o ambiente calculado em __post_init__
+        current_env = self._child_env
+        if env:
+            current_env = {**current_env, **env}
+        # Lê a saída linha a linha conforme é produzida, guardando apenas as
+        # últimas linhas para o relatório de erro
+        tail = deque(maxlen=COMMAND_OUTPUT_TAIL)
+        # A afinidade precisa valer desde o exec: o libgomp lê a máscara de CPUs
+        # ao carregar, antes que o pai consiga fixá-la depois do Popen
+        taskset = _taskset_path() if cpu_set else None
+        popen_cmd = cmd
+        if taskset:
+            cpus = ",".join(str(cpu) for cpu in sorted(cpu_set))
+            popen_cmd = [taskset, "-c", cpus, *cmd]
+        with subprocess.Popen(
+            popen_cmd,
+            env=current_env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=1,
+            text=True,
+            # Saída não UTF-8 de um binário não deve interromper a leitura
+            errors="replace",
+        ) as process:
+            with self._live_lock:
+                self._live_processes.add(process)
+            try:
+                # Sem o taskset, fixada pelo processo pai (preexec_fn não é
+                # seguro com threads); as threads OpenMP criadas antes disso
+                # podem ficar fora do conjunto
+                if cpu_set and not taskset:
+                    try:
+                        os.sched_setaffinity(process.pid, cpu_set)
+                    except OSError as affinity_error:
+                        logger.warning("Afinidade de CPU ignorada: %s", affinity_error)
+                for line in process.stdout:
+                    line = line.rstrip()
+                    if not line.strip():
+                        continue
+                    tail.append(line)
+                    if self.verbose:
+                        logger.info("   %s", line)
+            finally:
+                with self._live_lock:
+                    self._live_processes.discard(process)
+        if process.returncode:
+            logger.error("\n❌ Erro na execução do comando:")
+            for line in tail:
+                logger.error("   %s", line)
+            raise subprocess.CalledProcessError(
+                process.returncode, cmd, output="\n".join(tail)
             )
-            if result.stdout:
-                print("\n📝 Saída do comando:")
-                for line in result.stdout.split("\n"):
-                    if line.strip():
-                        print(f"   {line}")
-        except subprocess.CalledProcessError as e:
-            print("\n❌ Erro na execução do comando:")
-            if e.stdout:
-                print("\n📝 Saída padrão:")
-                for line in e.stdout.split("\n"):
-                    if line.strip():
-                        print(f"   {line}")
-            if e.stderr:
-                print("\n⚠️ Saída de erro:")
-                for line in e.stderr.split("\n"):
-                    if line.strip():
-                        print(f"   {line}")
-            raise
 
-    def _run_feature_extraction(self, cache_dir: Path) -> None:
-        """Extrai características das imagens"""
-        # Criar diretórios necessários
-        features_dir = cache_dir / "features"
-        features_dir.mkdir(exist_ok=True)
-        # Criar arquivo de lista de imagens
-        images_list = cache_dir / "images.txt"
-        with open(images_list, "w") as f:
-            for img in sorted(os.listdir(str(self.input_directory))):
-                if img.lower().endswith((".png", ".jpg", ".jpeg")):
-                    img_path = str(Path(self.input_directory) / img)
-                    f.write(f"{img_path}\n")
+    def _terminate_running(self) -> None:
+        """Encerra os subprocessos do AliceVision ainda em execução"""
+        with self._live_lock:
+            processes = list(self._live_processes)
+        for process in processes:
+            if process.poll() is None:
+                logger.warning("Encerrando processo %s", process.pid)
+                process.terminate()
+
+    def _fingerprint(self, cmd: List[str], inputs: List[Path]) -> str:
+        """Resume o comando e o estado (tamanho/mtime) das entradas de uma etapa"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update("\0".join(cmd).encode())
+        for path in inputs:
+            # Frames regravados com o mesmo conteúdo não invalidam as etapas
+            if path == self.input_directory and self.input_digest:
+                digest.update(f"{path}:{self.input_digest}".encode())
+                continue
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                digest.update(f"{path}:ausente".encode())
+                continue
+            digest.update(f"{path}:{st.st_size}:{st.st_mtime_ns}".encode())
+            # Para diretórios, considera também cada entrada de primeiro nível
+            if stat.S_ISDIR(st.st_mode):
+                with os.scandir(path) as entries:
+                    for entry in sorted(entries, key=lambda e: e.name):
+                        entry_st = entry.stat()
+                        digest.update(
+                            f"{entry.name}:{entry_st.st_size}:{entry_st.st_mtime_ns}".encode()
+                        )
+        return digest.hexdigest()
+
+    def _run_cached(
+        self,
+        stage_name: str,
+        cmd: List[str],
+        inputs: List[Path],
+        outputs: List[Path],
+        env: Optional[dict] = None,
+        cpu_set: Optional[frozenset] = None,
+    ) -> None:
+        """Executa o comando, pulando-o se as saídas já correspondem às entradas"""
+        stamp_file = self.stamps_dir / f"{stage_name}.stamp"
+        fingerprint = self._fingerprint(cmd, inputs)
+        if (
+            all(output.exists() for output in outputs)
+            and stamp_file.exists()
+            and stamp_file.read_text() == fingerprint
+        ):
+            logger.info("Etapa %s já calculada, reaproveitando saídas", stage_name)
+            self._produced.update(outputs)
+            return
+        self._run_command(cmd, env, cpu_set)
+        _atomic_write(stamp_file, fingerprint)
+
+    def _run_in_ranges(
+        self,
+        stage_name: str,
+        cmd: List[str],
+        nb_views: int,
+        max_workers: int,
+        inputs: List[Path],
+        outputs: List[Path],
+    ) -> None:
+        """Divide as vistas de uma etapa em intervalos executados em paralelo"""
+        if nb_views <= RANGE_SIZE:
+            self._run_cached(stage_name, cmd, inputs, outputs)
+            return
+        # Cada processo cobre um intervalo contíguo e disjunto de vistas; a
+        # divisão depende só do número de vistas, então o comando e o carimbo de
+        # cada bloco não mudam com a memória livre ou o número de CPUs
+        chunks = [
+            cmd + ["--rangeStart", str(start), "--rangeSize", str(RANGE_SIZE)]
+            for start in range(0, nb_views, RANGE_SIZE)
+        ]
+        workers = min(max_workers, len(chunks))
+        # Com GPUs disponíveis, cada processo fica com uma delas: mais processos
+        # que GPUs só disputariam a memória de vídeo
+        gpus = 0 if self.force_cpu else _gpu_count()
+        if gpus:
+            workers = min(workers, gpus)
+        workers = max(1, workers)
+        logger.info(
+            "Etapa %s: %s vistas em %s blocos de até %s, %s por vez",
+            stage_name,
+            nb_views,
+            len(chunks),
+            RANGE_SIZE,
+            workers,
+        )
+        # Cada worker em um conjunto próprio de CPUs, sem disputa entre processos
+        cpu_sets = _split_cpus(workers)
+        # Pool OpenMP de cada processo do tamanho da sua parte dos núcleos, com
+        # as threads próximas entre si; com GPUs, cada worker fica com uma delas
+        envs = []
+        for i, cpu_set in enumerate(cpu_sets):
+            threads = len(cpu_set) if cpu_set else (os.cpu_count() or 1) // workers
+            env = {
+                "OMP_NUM_THREADS": str(max(1, threads)),
+                "OMP_PROC_BIND": "close",
+                "OMP_PLACES": "cores",
+            }
+            if gpus:
+                env["CUDA_VISIBLE_DEVICES"] = str(i % gpus)
+            envs.append(env)
+        # Há mais blocos que workers: cada bloco ocupa uma vaga livre (CPUs e
+        # GPU) enquanto roda, e nenhuma vaga é usada por dois blocos ao mesmo tempo
+        slots = queue.SimpleQueue()
+        for slot in range(workers):
+            slots.put(slot)
+
+        def run_chunk(index: int, chunk: List[str]) -> None:
+            slot = slots.get()
+            try:
+                self._run_cached(
+                    f"{stage_name}_{index}",
+                    chunk,
+                    inputs,
+                    outputs,
+                    envs[slot],
+                    cpu_sets[slot],
+                )
+            finally:
+                slots.put(slot)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(run_chunk, i, chunk) for i, chunk in enumerate(chunks)
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                self._terminate_running()
+                raise
+
+    def _should_dump(self, path: Path) -> bool:
+        """Indica se o conteúdo do arquivo deve ir para o log de depuração"""
+        return (
+            logger.isEnabledFor(logging.DEBUG)
+            and path.stat().st_size <= DEBUG_DUMP_MAX_BYTES
+        )
+
+    def _require_inputs(self, *paths: Path) -> None:
+        """Falha antes de iniciar o subprocesso se faltar algum pré-requisito"""
+        for path in paths:
+            if path in self._produced:
+                continue
+            if not path.exists():
+                raise FileNotFoundError(f"Pré-requisito não encontrado: {path}")
+            self._produced.add(path)
+
+    def _list_images(self) -> List[str]:
+        """Lista as imagens de entrada, falhando se o diretório não tiver nenhuma"""
+        with os.scandir(self.input_directory) as entries:
+            images = sorted(
+                entry.path
+                for entry in entries
+                if os.path.splitext(entry.name)[1][1:].lower() in IMAGE_EXTENSIONS
+                and entry.is_file()
+            )
         # Verificar se há imagens
-        if not images_list.stat().st_size:
+        if not images:
             raise ValueError(
                 f"Nenhuma imagem encontrada no diretório: {self.input_directory}"
             )
-        print(f"Processando {sum(1 for _ in open(images_list))} imagens")
+        return images
+
+    def _run_camera_init(self) -> None:
+        """Gera o arquivo SfM inicial a partir das imagens de entrada"""
+        # Criar arquivo de lista de imagens com a listagem feita em process_images
+        images = self._images
+        _atomic_write(self.images_list, "\n".join(images) + "\n")
+        logger.info("Processando %s imagens", len(images))
         # Gerar arquivo SfM a partir da lista de imagens
-        sfm_file = cache_dir / "sfm.json"
-        sensor_db = self.alicevision_share / "cameraSensors.db"
+        sfm_file = self.init_sfm_file
+        sensor_db = self.sensor_db
         if not sensor_db.exists():
-            print(
-                f"Aviso: Arquivo de banco de dados de sensores não encontrado: {sensor_db}"
+            logger.warning(
+                "Aviso: Arquivo de banco de dados de sensores não encontrado: %s",
+                sensor_db,
             )
-            print("Tentando prosseguir sem o banco de dados de sensores...")
+            logger.warning("Tentando prosseguir sem o banco de dados de sensores...")
             sensor_db = None
         cmd = [
             self._get_bin_path("aliceVision_cameraInit"),
@@ -272,7 +1057,12 @@ colorspaces:
             cmd.extend(["--sensorDatabase", str(sensor_db)])
         else:
             cmd.extend(["--defaultCameraModel", "pinhole"])
-        self._run_command(cmd)
+        self._run_cached(
+            "camera_init",
+            cmd,
+            inputs=[self.input_directory, self.sensor_db],
+            outputs=[sfm_file],
+        )
         # Verificar se o arquivo SfM foi gerado
         if not sfm_file.exists():
             raise RuntimeError(f"Falha ao gerar arquivo SfM: {sfm_file}")
@@ -280,6 +1070,11 @@ colorspaces:
         with open(sfm_file, "r") as f:
             if not f.read().strip():
                 raise RuntimeError(f"Arquivo SfM vazio: {sfm_file}")
+
+    def _run_feature_extraction(self) -> None:
+        """Extrai características das imagens"""
+        features_dir = self.features_dir
+        sfm_file = self.init_sfm_file
         # Configurar comando de extração de características
         cmd = [
             self._get_bin_path("aliceVision_featureExtraction"),
@@ -294,64 +1089,71 @@ colorspaces:
         ]
         if self.force_cpu:
             cmd.extend(["--forceCpuExtraction", "1"])
-        self._run_command(cmd)
+        nb_views = len(orjson.loads(sfm_file.read_bytes()).get("views", []))
+        self._run_in_ranges(
+            "feature_extraction",
+            cmd,
+            nb_views,
+            self.max_feature_extraction_workers,
+            inputs=[sfm_file, self.input_directory],
+            outputs=[features_dir],
+        )
 
-    def _run_image_matching(self, cache_dir: Path) -> None:
+    def _run_image_matching(self) -> None:
         """Realiza matching entre imagens"""
-        # Criar diretórios necessários
-        matches_dir = cache_dir / "matches"
-        matches_dir.mkdir(exist_ok=True)
         # Verificar se o arquivo SfM existe
-        sfm_file = cache_dir / "sfm.json"
+        sfm_file = self.init_sfm_file
         if not sfm_file.exists():
             raise RuntimeError(f"Arquivo SfM não encontrado: {sfm_file}")
-        # Debug: Imprimir conteúdo do sfm.json
-        print("\nConteúdo do sfm.json:")
-        with open(sfm_file) as f:
-            sfm_data = json.load(f)
-            print(json.dumps(sfm_data, indent=2))
+        # Debug: Imprimir conteúdo do sfm.json sem reserializá-lo
+        if self._should_dump(sfm_file):
+            logger.debug("\nConteúdo do sfm.json:\n%s", sfm_file.read_text())
         # Verificar se o arquivo tree existe
-        tree_file = self.alicevision_share / "vlfeat_K80L3.SIFT.tree"
+        tree_file = self.tree_file
         if not tree_file.exists():
             raise RuntimeError(f"Arquivo tree não encontrado: {tree_file}")
         # Gerar pares de imagens
-        image_pairs_file = matches_dir / "image_pairs.txt"
-        views = sfm_data.get("views", [])
-        pairs = []
-        for i in range(len(views) - 1):
-            view_id1 = views[i].get("viewId")
-            view_id2 = views[i + 1].get("viewId")
-            if view_id1 is not None and view_id2 is not None:
-                try:
-                    view_id1 = int(view_id1)
-                    view_id2 = int(view_id2)
-                except ValueError:
-                    print(
-                        f"Aviso: ViewIds '{view_id1}' e/ou '{view_id2}' não são números inteiros. Usando índices {i} e {i+1}."
-                    )
-                    view_id1 = i
-                    view_id2 = i + 1
-                pairs.append(f"{view_id1} {view_id2}")
-        print("\nPares de imagens gerados:")
-        for pair in pairs:
-            print(f"  - {pair}")
-        with open(image_pairs_file, "w") as f:
-            f.write("\n".join(pairs))
-            f.write("\n")  # Adiciona uma linha em branco no final
-
-    def _run_feature_matching(self, cache_dir: Path) -> None:
+        image_pairs_file = self.image_pairs_file
+        # Lê apenas os viewIds, sem carregar o SfM inteiro na memória
+        with open(sfm_file, "rb") as f:
+            view_ids = [
+                view_id
+                for view_id in ijson.items(f, "views.item.viewId")
+                if view_id is not None
+            ]
+        try:
+            ids = np.array(view_ids, dtype=np.int64)
+        except (TypeError, ValueError):
+            logger.warning(
+                "Aviso: ViewIds não são números inteiros. Usando índices das vistas."
+            )
+            ids = np.arange(len(view_ids), dtype=np.int64)
+        # Cada vista é pareada com a seguinte, formatado em uma única chamada
+        pairs = np.column_stack([ids[:-1], ids[1:]])
+        buffer = io.StringIO()
+        np.savetxt(buffer, pairs, fmt="%d")
+        content = buffer.getvalue()
+        logger.info("\nPares de imagens gerados: %s", len(pairs))
+        logger.debug("%s", content)
+        # Só reescreve quando os pares mudam, preservando o cache da etapa seguinte
+        if not image_pairs_file.exists() or image_pairs_file.read_text() != content:
+            _atomic_write(image_pairs_file, content)
+
+    def _run_feature_matching(self) -> None:
         """Executa o matching de características"""
-        image_pairs_file = cache_dir / "matches" / "image_pairs.txt"
+        image_pairs_file = self.image_pairs_file
         if not image_pairs_file.exists():
             raise RuntimeError(
                 f"Arquivo image_pairs.txt não encontrado em: {image_pairs_file}. Verifique o comando aliceVision_imageMatching."
             )
         # Debug: Imprimir conteúdo do arquivo de pares
-        print("\nConteúdo do arquivo image_pairs.txt:")
-        with open(image_pairs_file) as f:
-            print(f.read())
+        if self._should_dump(image_pairs_file):
+            logger.debug(
+                "\nConteúdo do arquivo image_pairs.txt:\n%s",
+                image_pairs_file.read_text(),
+            )
         # Verificar se o diretório de features existe e tem arquivos
-        features_dir = cache_dir / "features"
+        features_dir = self.features_dir
         if not features_dir.exists() or not any(features_dir.iterdir()):
             raise RuntimeError(
                 f"Diretório de features vazio ou não encontrado: {features_dir}"
@@ -359,9 +1161,9 @@ colorspaces:
         cmd = [
             self._get_bin_path("aliceVision_featureMatching"),
             "--input",
-            str(cache_dir / "sfm.json"),
+            str(self.init_sfm_file),
             "--output",
-            str(cache_dir / "matches"),
+            str(self.matches_dir),
             "--featuresFolders",
             str(features_dir),
             "--imagePairs",
@@ -380,30 +1182,22 @@ colorspaces:
             "info",
         ]
         try:
-            self._run_command(cmd)
-        except subprocess.CalledProcessError as e:
-            print(f"\nErro no feature matching. Saída do comando:")
-            if hasattr(e, "stdout"):
-                print("Saída padrão:")
-                print(e.stdout)
-            if hasattr(e, "stderr"):
-                print("Saída de erro:")
-                print(e.stderr)
+            self._run_cached(
+                "feature_matching",
+                cmd,
+                inputs=[self.init_sfm_file, features_dir, image_pairs_file],
+                outputs=[self.matches_dir],
+            )
+        except subprocess.CalledProcessError:
+            # A saída do comando já foi registrada por _run_command
+            logger.error("\nErro no feature matching.")
             raise
 
-    def _run_structure_from_motion(self, cache_dir: Path) -> None:
+    def _run_structure_from_motion(self) -> None:
         """Executa a reconstrução da estrutura a partir do movimento"""
-        env = os.environ.copy()
-        # Configurar ambiente para CPU/GPU
-        if self.force_cpu:
-            env["CUDA_VISIBLE_DEVICES"] = "-1"
-            env["ALICEVISION_USE_CUDA"] = "0"
-        # Criar diretório sfm se não existir
-        sfm_dir = cache_dir / "sfm"
-        sfm_dir.mkdir(exist_ok=True)
         # Usar o arquivo sfm.json diretamente do cache_dir como entrada
-        input_sfm = cache_dir / "sfm.json"
-        output_sfm = sfm_dir / "sfm.json"
+        input_sfm = self.init_sfm_file
+        output_sfm = self.sfm_file
         if not input_sfm.exists():
             raise FileNotFoundError(
                 f"Arquivo de entrada sfm.json não encontrado: {input_sfm}"
@@ -415,9 +1209,9 @@ colorspaces:
             "--output",
             str(output_sfm),
             "--matchesFolder",
-            str(cache_dir / "matches"),
+            str(self.matches_dir),
             "--featuresFolders",
-            str(cache_dir / "features"),
+            str(self.features_dir),
             "--minAngleInitialPair",
             "3",
             "--maxAngleInitialPair",
@@ -425,7 +1219,12 @@ colorspaces:
             "--minNumberOfMatches",
             "50",
         ]
-        self._run_command(cmd, env=env)
+        self._run_cached(
+            "structure_from_motion",
+            cmd,
+            inputs=[input_sfm, self.matches_dir, self.features_dir],
+            outputs=[output_sfm],
+        )
         # Verificar se o arquivo foi gerado
         if not output_sfm.exists():
             # Se o arquivo não foi gerado no diretório sfm, verificar no cache_dir
@@ -437,124 +1236,156 @@ colorspaces:
                 )
             else:
                 # Se o arquivo existe apenas no cache_dir, copiar para o diretório sfm
-                import shutil
-
-                shutil.copy2(str(input_sfm), str(output_sfm))
-                print(f"Arquivo sfm.json copiado de {input_sfm} para {output_sfm}")
-        # Debug: mostrar conteúdo do arquivo gerado
-        try:
-            with open(output_sfm, "r") as f:
-                sfm_data = json.load(f)
-                print(
-                    f"\nConteúdo do arquivo sfm.json gerado:\n{json.dumps(sfm_data, indent=2)}"
+                shutil.copy2(input_sfm, output_sfm)
+                logger.info(
+                    "Arquivo sfm.json copiado de %s para %s", input_sfm, output_sfm
+                )
+        # Debug: mostrar conteúdo do arquivo gerado apenas em nível DEBUG
+        if self._should_dump(output_sfm):
+            try:
+                sfm_data = orjson.loads(output_sfm.read_bytes())
+                logger.debug(
+                    "\nConteúdo do arquivo sfm.json gerado:\n%s",
+                    orjson.dumps(sfm_data, option=orjson.OPT_INDENT_2).decode(),
+                )
+            except Exception as e:
+                logger.warning(
+                    "Aviso: Não foi possível ler o arquivo sfm.json para debug: %s", e
                 )
-        except Exception as e:
-            print(f"Aviso: Não foi possível ler o arquivo sfm.json para debug: {e}")
 
-    def _run_prepare_dense_scene(self, cache_dir: Path) -> None:
+    def _run_prepare_dense_scene(self) -> None:
         """Prepara a cena para a reconstrução densa"""
+        self._require_inputs(self.sfm_file)
         # Adicionado: verificar o conteúdo do diretório cache
-        print("Conteúdo do diretório cache:")
-        for item in cache_dir.iterdir():
-            print(f"  - {item}")
+        if self.verbose:
+            logger.info(
+                "Conteúdo do diretório cache:\n  - %s",
+                "\n  - ".join(str(item) for item in self.cache_dir.iterdir()),
+            )
 
         cmd = [
             self._get_bin_path("aliceVision_prepareDenseScene"),
             "--input",
-            str(cache_dir / "sfm" / "sfm.json"),
+            str(self.sfm_file),
             "--output",
-            str(cache_dir / "mvsData"),
+            str(self.mvs_dir),
         ]
-        self._run_command(cmd)
+        self._run_in_ranges(
+            "prepare_dense_scene",
+            cmd,
+            self._count_reconstructed_views(),
+            self.max_depth_map_workers,
+            inputs=[self.sfm_file],
+            outputs=[self.mvs_dir],
+        )
+
+    def _count_reconstructed_views(self) -> int:
+        """Conta as vistas do SfM reconstruído, usadas para dividir as etapas densas"""
+        return len(orjson.loads(self.sfm_file.read_bytes()).get("views", []))
 
-    def _run_depth_map_estimation(self, cache_dir: Path) -> None:
-        """Estima mapas de profundidade"""
+    def _run_depth_map_estimation(self) -> None:
+        """Estima mapas de profundidade, dividindo as vistas entre processos"""
+        self._require_inputs(self.mvs_dir, self.sfm_file)
         cmd = [
             self._get_bin_path("aliceVision_depthMapEstimation"),
             "--input",
-            str(cache_dir / "mvsData" / "sfm.json"),
+            str(self.mvs_sfm_file),
             "--output",
-            str(cache_dir / "depthMap"),
+            str(self.depth_map_dir),
         ]
-        self._run_command(cmd)
+        self._run_in_ranges(
+            "depth_map_estimation",
+            cmd,
+            self._count_reconstructed_views(),
+            self.max_depth_map_workers,
+            inputs=[self.mvs_dir],
+            outputs=[self.depth_map_dir],
+        )
 
-    def _run_depth_map_filter(self, cache_dir: Path) -> None:
+    def _run_depth_map_filter(self) -> None:
         """Filtra mapas de profundidade"""
+        self._require_inputs(self.depth_map_dir)
         cmd = [
             self._get_bin_path("aliceVision_depthMapFiltering"),
             "--input",
-            str(cache_dir / "mvsData" / "sfm.json"),
+            str(self.mvs_sfm_file),
             "--depthMapsFolder",
-            str(cache_dir / "depthMap"),
+            str(self.depth_map_dir),
             "--output",
-            str(cache_dir / "depthMap_filtered"),
+            str(self.depth_map_filtered_dir),
         ]
-        self._run_command(cmd)
+        self._run_in_ranges(
+            "depth_map_filter",
+            cmd,
+            self._count_reconstructed_views(),
+            self.max_depth_map_workers,
+            inputs=[self.depth_map_dir],
+            outputs=[self.depth_map_filtered_dir],
+        )
 
-    def _run_meshing(self, cache_dir: Path) -> None:
+    def _run_meshing(self) -> None:
         """Cria a malha 3D"""
+        self._require_inputs(self.depth_map_filtered_dir)
         cmd = [
             self._get_bin_path("aliceVision_meshing"),
             "--input",
-            str(cache_dir / "mvsData" / "sfm.json"),
+            str(self.mvs_sfm_file),
             "--depthMapsFolder",
-            str(cache_dir / "depthMap_filtered"),
+            str(self.depth_map_filtered_dir),
             "--output",
-            str(cache_dir / "mesh.obj"),
+            str(self.mesh_file),
         ]
-        self._run_command(cmd)
+        self._run_cached(
+            "meshing",
+            cmd,
+            inputs=[self.mvs_dir, self.depth_map_filtered_dir],
+            outputs=[self.mesh_file],
+        )
 
-    def _run_mesh_filtering(self, cache_dir: Path) -> None:
+    def _run_mesh_filtering(self) -> None:
         """Filtra a malha 3D"""
+        self._require_inputs(self.mesh_file)
         cmd = [
             self._get_bin_path("aliceVision_meshFiltering"),
             "--input",
-            str(cache_dir / "mesh.obj"),
+            str(self.mesh_file),
             "--output",
-            str(cache_dir / "mesh_filtered.obj"),
+            str(self.mesh_filtered_file),
         ]
-        self._run_command(cmd)
+        self._run_cached(
+            "mesh_filtering",
+            cmd,
+            inputs=[self.mesh_file],
+            outputs=[self.mesh_filtered_file],
+        )
 
-    def _run_texturing(self, cache_dir: Path) -> None:
+    def _run_texturing(self) -> None:
         """Aplica textura à malha 3D"""
-        output_path = str(Path(self.output_directory) / "textured_model")
+        self._require_inputs(self.mesh_filtered_file)
+        output_path = str(self.textured_model_dir)
         cmd = [
             self._get_bin_path("aliceVision_texturing"),
             "--input",
-            str(cache_dir / "mesh_filtered.obj"),
+            str(self.mesh_filtered_file),
             "--imagesFolder",
             str(self.input_directory),
             "--inputMesh",
-            str(cache_dir / "mesh_filtered.obj"),
+            str(self.mesh_filtered_file),
             "--output",
             output_path,
         ]
-        self._run_command(cmd)
+        self._run_cached(
+            "texturing",
+            cmd,
+            inputs=[self.mesh_filtered_file, self.input_directory],
+            outputs=[self.textured_model_dir],
+        )
 
-    def _verify_installation(self) -> None:
-        """Verifica se o AliceVision está corretamente instalado e configurado"""
-        # Verificar se os binários existem
-        feature_extraction_bin = self._get_bin_path("aliceVision_featureExtraction")
-        if not os.path.exists(feature_extraction_bin):
-            raise ValueError(
-                f"Binário AliceVision não encontrado: {feature_extraction_bin}"
-            )
-        # Verificar permissões
-        if not os.access(feature_extraction_bin, os.X_OK):
-            print(
-                f"Aviso: Binário {feature_extraction_bin} não tem permissão de execução."
-            )
-            print("Tentando corrigir permissões...")
-            try:
-                os.chmod(feature_extraction_bin, 0o755)  # rwxr-xr-x
-                print("Permissões corrigidas.")
-            except Exception as e:
-                print(f"Erro ao corrigir permissões: {e}")
-        # Listar bibliotecas no diretório lib para debug
-        print("Bibliotecas disponíveis no diretório lib:")
-        try:
-            for file in sorted(os.listdir(self.alicevision_lib_path)):
-                if file.endswith(".so") or ".so." in file:
-                    print(f"  - {file}")
-        except Exception as e:
-            print(f"Erro ao listar bibliotecas: {e}")
+    def verify(self) -> bool:
+        """Indica se todos os binários do pipeline estão disponíveis, sem nova varredura"""
+        missing = [
+            name for name in PIPELINE_BINARIES if name not in self.alicevision_bins
+        ]
+        if missing:
+            logger.warning("Binários AliceVision ausentes: %s", ", ".join(missing))
+        return not missing
@@ -1,13 +1,69 @@
+import hashlib
+import io
+import logging
+import math
 import os
-from dataclasses import dataclass
+import shutil
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple, Union
 from converter.services.alicevision_processor import Processor
 from converter.services.alicevision_processor import AliceVisionProcessor
+import av
 import cv2
+import numpy as np
+import piexif
 from cv2.typing import MatLike
 from pyexiv2 import Image as ExivImage
+from pyexiv2 import ImageData as ExivImageData
 
 from object_values.type_videos import TypeVideos
 
+logger = logging.getLogger(__name__)
+
+# Metade dos núcleos para o pool interno do OpenCV; a outra metade fica com o
+# pool que codifica e grava os frames
+cv2.setNumThreads(max(1, (os.cpu_count() or 1) // 2))
+# Decodificação multithread no backend FFmpeg do VideoCapture, lida na abertura
+os.environ.setdefault("OPENCV_FFMPEG_CAPTURE_OPTIONS", f"threads;{os.cpu_count() or 1}")
+
+# Largura usada para medir a nitidez; frames maiores são reduzidos antes
+BLUR_SAMPLE_WIDTH = 640
+# Variância mínima do Laplaciano, medida na largura de BLUR_SAMPLE_WIDTH, para um
+# frame ser considerado nítido. A redução aumenta bastante a variância: na
+# amostra src/tmp/base.JPEG reduzida a 640 px, o original dá ~420, um desfoque
+# gaussiano de σ=1 dá ~210 e um de σ=2 dá ~71 (40 era o limite na resolução
+# cheia, onde esses valores eram ~118, ~17 e ~4)
+BLUR_THRESHOLD = 300
+# Fração da nitidez média dos vizinhos abaixo da qual um frame é descartado
+BLUR_RELATIVE_FACTOR = 0.5
+# Vídeos a partir deste total de frames (~5 min a 30 fps) são divididos em
+# SHARD_COUNT intervalos extraídos por tarefas paralelas; abaixo disso, o custo
+# de despachar as tarefas não compensa
+SHARDED_MIN_FRAMES = 9000
+SHARD_COUNT = 4
+# tmpfs opcional para os frames, usado só com ao menos TMPFS_MIN_FREE livres
+# (o /dev/shm de um contêiner Docker tem 64 MB por padrão)
+TMPFS_PATH = "/dev/shm"
+TMPFS_MIN_FREE = 2 << 30  # 2 GiB
+# Qualidade 85 basta para a extração de características e reduz bem os arquivos
+JPEG_PARAMS = [
+    cv2.IMWRITE_JPEG_QUALITY,
+    85,
+    cv2.IMWRITE_JPEG_OPTIMIZE,
+    1,
+    cv2.IMWRITE_JPEG_PROGRESSIVE,
+    0,
+]
+# Frame gravado: (caminho, nitidez, SHA-256 do arquivo)
+SavedFrame = Tuple[str, float, str]
+
+# Sem o libjpeg-turbo (SIMD) a codificação JPEG fica várias vezes mais lenta
+if "libjpeg-turbo" not in cv2.getBuildInformation():
+    logger.warning("OpenCV compilado sem libjpeg-turbo: gravação de JPEG mais lenta")
+
 
 @dataclass
 class VideoFrameExtractor:
@@ -16,22 +72,97 @@ class VideoFrameExtractor:
     name_video: str
     format: TypeVideos
     output_3d_path: str = "src/tmp/3d_models"
+    # Onde os frames extraídos são gravados
+    frames_path: str = "src/tmp"
+    # Grava os frames no tmpfs (RAM) em vez de frames_path, se houver espaço.
+    # O tmpfs é local à máquina: só serve quando extração e reconstrução rodam
+    # no mesmo host
+    use_tmpfs: bool = False
+    max_workers: int = os.cpu_count() or 1
+    # Frames por segundo de vídeo aproveitados na reconstrução
+    target_fps: float = 3.0
+    # Passo fixo entre frames aproveitados; quando definido, ignora target_fps
+    sample_stride: Optional[int] = None
+    # Limite de frames amostrados; quando definido, busca-os diretamente no vídeo
+    max_frames: Optional[int] = None
+    # Decodifica só os quadros-chave, descartando os P/B no próprio decodificador
+    keyframes_only: bool = False
+    # Vizinhos de cada lado comparados na nitidez relativa; 0 desativa o filtro
+    blur_window: int = 0
+    # EXIF da imagem de referência, lido uma única vez por execução
+    _exif_bytes: Optional[bytes] = field(default=None, init=False, repr=False)
+    # Buffers da medida de nitidez, um conjunto por thread do pool
+    _blur_buffers: threading.local = field(
+        default_factory=threading.local, init=False, repr=False
+    )
+
+    def __post_init__(self):
+        if self.use_tmpfs:
+            self.frames_path = self._tmpfs_or_default()
 
     def execute(self) -> None:
         """Processa o vídeo, extraindo frames e gerando modelo 3D."""
         print(f"\n=== Iniciando processamento do vídeo: {self.name_video} ===")
-        video_path = os.path.join(
-            self.path_video, f"{self.name_video}.{self.format.value}"
-        )
-        video = cv2.VideoCapture(video_path)
-
-        if not video.isOpened():
-            raise ValueError(f"Não foi possível abrir o vídeo em: {video_path}")
+        video = self._open_source(self._video_path())
 
         try:
+            self._load_image_metadata(self.path_image_metadata)
             print("\n1. Extraindo frames do vídeo...")
-            output_dir = self._process_video_frames(video)
-            print("\n2. Iniciando geração do modelo 3D...")
+            frames = self._process_video_frames(video)
+        except BaseException:
+            self._discard_tmpfs_frames()
+            raise
+        finally:
+            self._close_source(video)
+        self.generate_model(frames)
+
+    def frame_ranges(self, parts: int = SHARD_COUNT) -> List[Tuple[int, int]]:
+        """Divide o vídeo em `parts` intervalos [início, fim) de frames, ou em um
+        único intervalo se o vídeo for curto demais para compensar a divisão."""
+        total = self._frame_count()
+        if total <= 0:
+            return []
+        # A busca direta do max_frames já limita o trabalho a poucos frames
+        if total < SHARDED_MIN_FRAMES or self.max_frames or parts <= 1:
+            return [(0, total)]
+        chunk_size = math.ceil(total / parts)
+        return [
+            (start, min(start + chunk_size, total))
+            for start in range(0, total, chunk_size)
+        ]
+
+    def extract_range(self, start: int, end: int) -> List[SavedFrame]:
+        """Extrai só os frames [start, end), para tarefas que dividem o vídeo.
+
+        O filtro de nitidez relativa não roda aqui: generate_model o aplica uma
+        única vez sobre os frames de todos os intervalos.
+        """
+        video = self._open_source(self._video_path())
+        # Os intervalos rodam ao mesmo tempo na mesma máquina: o pool do OpenCV
+        # encolhe junto com o dos workers, em vez de cada um usar todos os núcleos
+        cv2_threads = cv2.getNumThreads()
+        cv2.setNumThreads(max(1, self.max_workers // 2))
+        try:
+            self._load_image_metadata(self.path_image_metadata)
+            print(f"\n1. Extraindo frames {start} a {end} do vídeo...")
+            return self._process_video_frames(video, start, end)
+        finally:
+            cv2.setNumThreads(cv2_threads)
+            self._close_source(video)
+
+    def generate_model(self, frames: List[SavedFrame]) -> None:
+        """Gera o modelo 3D a partir dos frames já extraídos, na ordem do vídeo."""
+        if self.blur_window:
+            frames = self._drop_relative_blurry(frames)
+        print(f"   ✓ Frames usados na reconstrução: {len(frames)}")
+        # Resumo do conteúdo calculado na gravação: o cache do AliceVision não
+        # precisa reler os frames para saber se mudaram
+        input_digest = hashlib.blake2b(digest_size=16)
+        for image_path, _, digest in frames:
+            input_digest.update(f"{os.path.basename(image_path)}:{digest}\0".encode())
+        output_dir = self._frames_dir()
+        print("\n2. Iniciando geração do modelo 3D...")
+        try:
             self._generate_3d_model(
                 output_dir,
                 AliceVisionProcessor(
@@ -39,69 +170,364 @@ class VideoFrameExtractor:
                     output_directory=self.output_3d_path,
                     alicevision_bin_path="/home/pedro/dev/tcc/src/Framework/aliceVision/bin",
                     force_cpu=True,
+                    input_digest=input_digest.hexdigest(),
                 ),
             )
-            print("\n=== Processamento concluído com sucesso! ===")
         finally:
+            self._discard_tmpfs_frames()
+        print("\n=== Processamento concluído com sucesso! ===")
+
+    def _video_path(self) -> str:
+        return os.path.join(self.path_video, f"{self.name_video}.{self.format.value}")
+
+    def _frames_dir(self) -> str:
+        return os.path.join(self.frames_path, self.name_video)
+
+    def _discard_tmpfs_frames(self) -> None:
+        """Apaga os frames gravados no tmpfs, onde ocupariam RAM até o próximo boot.
+
+        No disco eles ficam: servem para depurar ou refazer uma reconstrução
+        que falhou e mantêm válido o cache das etapas do AliceVision.
+        """
+        if self.frames_path == TMPFS_PATH:
+            shutil.rmtree(self._frames_dir(), ignore_errors=True)
+
+    def _tmpfs_or_default(self) -> str:
+        """O tmpfs, se existir e tiver espaço livre suficiente, ou frames_path."""
+        try:
+            free = shutil.disk_usage(TMPFS_PATH).free
+        except OSError:
+            print(
+                f"   ⚠ {TMPFS_PATH} indisponível, gravando os frames em {self.frames_path}"
+            )
+            return self.frames_path
+        if free < TMPFS_MIN_FREE:
+            print(
+                f"   ⚠ {TMPFS_PATH} com {free >> 20} MB livres, gravando os frames "
+                f"em {self.frames_path}"
+            )
+            return self.frames_path
+        return TMPFS_PATH
+
+    def _frame_count(self) -> int:
+        """Total de frames lido do cabeçalho do contêiner, sem abrir o decodificador."""
+        try:
+            with av.open(self._video_path()) as container:
+                stream = container.streams.video[0]
+                if stream.frames:
+                    return stream.frames
+                # Contêineres sem a contagem no cabeçalho: estima pela duração
+                if stream.duration and stream.average_rate:
+                    return int(stream.duration * stream.time_base * stream.average_rate)
+        except (av.FFmpegError, IndexError):
+            pass
+        return 0
+
+    def _open_source(
+        self, video_path: str
+    ) -> Union[av.container.InputContainer, cv2.VideoCapture]:
+        """Abre o vídeo pelo PyAV, com o OpenCV para a busca direta e como reserva."""
+        if not self.max_frames:
+            try:
+                return av.open(video_path)
+            except av.FFmpegError as e:
+                print(f"   ⚠ PyAV não abriu o vídeo ({e}), usando o OpenCV")
+        video = self._open_video(video_path)
+        if not video.isOpened():
+            raise ValueError(f"Não foi possível abrir o vídeo em: {video_path}")
+        return video
+
+    def _open_video(self, video_path: str) -> cv2.VideoCapture:
+        """Abre o vídeo pelo FFmpeg, com decodificação em hardware se houver."""
+        # A aceleração só vale se pedida na abertura; builds antigos do OpenCV
+        # não têm essas constantes e abrem o vídeo só com o FFmpeg
+        if hasattr(cv2, "CAP_PROP_HW_ACCELERATION"):
+            params = [
+                cv2.CAP_PROP_HW_ACCELERATION,
+                cv2.VIDEO_ACCELERATION_ANY,
+                cv2.CAP_PROP_HW_DEVICE,
+                0,
+            ]
+            video = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG, params)
+        else:
+            video = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG)
+        if not video.isOpened():
+            # Sem o backend FFmpeg nesse build, volta ao backend padrão
+            video = cv2.VideoCapture(video_path)
+        # Leitura de arquivo não precisa de frames pré-carregados no buffer
+        video.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return video
+
+    @staticmethod
+    def _close_source(
+        video: Union[av.container.InputContainer, cv2.VideoCapture],
+    ) -> None:
+        if isinstance(video, cv2.VideoCapture):
             video.release()
-            cv2.destroyAllWindows()
+        else:
+            video.close()
 
-    def _process_video_frames(self, video: cv2.VideoCapture) -> str:
-        output_dir = os.path.join("src/tmp", self.name_video)
+    def _process_video_frames(
+        self,
+        video: Union[av.container.InputContainer, cv2.VideoCapture],
+        start: int = 0,
+        end: Optional[int] = None,
+    ) -> List[SavedFrame]:
+        """Grava os frames nítidos do intervalo [start, end), devolvendo-os em ordem."""
+        output_dir = self._frames_dir()
         os.makedirs(output_dir, exist_ok=True)
 
         frame_count = 0
-        frames_processados = 0
+        salvos = []
         print(f"   → Diretório de saída: {output_dir}")
 
-        while True:
-            success, frame = video.read()
-            if not success:
+        # A leitura fica na thread principal; conversão, nitidez e gravação rodam
+        # no pool (o OpenCV libera o GIL), com no máximo 2 frames por worker
+        # aguardando em memória
+        pendentes = deque()
+
+        def coletar() -> None:
+            image_path, pendente = pendentes.popleft()
+            saved = pendente.result()
+            if saved is not None:
+                salvos.append((image_path, *saved))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            if isinstance(video, cv2.VideoCapture):
+                frames = self._read_frames(video, start, end)
+            else:
+                frames = self._decode_frames(video, start, end)
+            for frame_count, frame in frames:
+                image_path = os.path.join(
+                    output_dir, f"{self.name_video}_{frame_count}.jpeg"
+                )
+                pendentes.append(
+                    (image_path, executor.submit(self._save_frame, frame, image_path))
+                )
+                if len(pendentes) >= 2 * self.max_workers:
+                    coletar()
+
+            while pendentes:
+                coletar()
+
+        print(f"\n   ✓ Concluído! Total de frames processados: {frame_count}")
+        print(f"   ✓ Frames válidos mantidos: {len(salvos)}")
+        return salvos
+
+    def _drop_relative_blurry(self, salvos: List[SavedFrame]) -> List[SavedFrame]:
+        """Remove os frames bem menos nítidos que a média da sua vizinhança."""
+        scores = np.array([score for _, score, _ in salvos], dtype=np.float64)
+        # Média móvel de ±blur_window frames por somas acumuladas, com a janela
+        # encurtada nas pontas
+        sums = np.concatenate(([0.0], np.cumsum(scores)))
+        positions = np.arange(len(scores))
+        start = np.maximum(positions - self.blur_window, 0)
+        end = np.minimum(positions + self.blur_window + 1, len(scores))
+        means = (sums[end] - sums[start]) / (end - start)
+        keep = scores >= BLUR_RELATIVE_FACTOR * means
+
+        # Índices obtidos direto da máscara, sem testar frame a frame em Python
+        dropped = np.flatnonzero(~keep)
+        for index in dropped:
+            os.remove(salvos[index][0])
+        print(f"   → Descartados pela nitidez relativa: {len(dropped)}")
+        return [salvos[index] for index in np.flatnonzero(keep)]
+
+    def _decode_frames(
+        self,
+        container: av.container.InputContainer,
+        start: int = 0,
+        end: Optional[int] = None,
+    ) -> Iterator[Tuple[int, MatLike]]:
+        """Gera os frames amostrados decodificados pelo libav, em várias threads."""
+        stream = container.streams.video[0]
+        # Decodificação paralela por frame e por fatia, com uma thread por worker
+        stream.thread_type = "AUTO"
+        stream.codec_context.thread_count = self.max_workers
+        if self.keyframes_only:
+            stream.codec_context.skip_frame = "NONKEY"
+            stride = 1
+        else:
+            stride = self._sample_stride(float(stream.average_rate or 0))
+
+        rate = stream.average_rate
+        time_base = stream.time_base
+        origin = stream.start_time or 0
+        if start and rate and time_base:
+            # Volta ao quadro-chave anterior ao início do intervalo; os frames
+            # até o início são decodificados e descartados pela posição
+            container.seek(origin + int(start / (rate * time_base)), stream=stream)
+
+        frame_count = 0
+        for frame in container.decode(stream):
+            if frame.pts is not None and rate and time_base:
+                # Posição pelo instante do frame: a mesma numa leitura única e
+                # em cada intervalo, e nunca repetida em vídeos de taxa variável
+                position = round((frame.pts - origin) * time_base * rate) + 1
+                frame_count = max(frame_count + 1, position)
+            else:
+                frame_count += 1
+            if frame_count <= start:
+                continue
+            if end is not None and frame_count > end:
                 break
+            if frame_count % 10 == 0:  # Atualiza a cada 10 frames
+                print(f"   → Processando frame {frame_count}")
+            if (frame_count - 1) % stride:
+                continue
+            # Conversão para BGR só nos frames aproveitados
+            yield frame_count, frame.to_ndarray(format="bgr24")
+
+    def _read_frames(
+        self, video: cv2.VideoCapture, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[Tuple[int, MatLike]]:
+        """Gera os frames amostrados do vídeo com sua posição (a partir de 1)."""
+        indices = self._seek_indices(video) if not start and end is None else None
+        if indices is not None:
+            # Busca direta: só os frames escolhidos são decodificados
+            print(f"   → Buscando {len(indices)} frames diretamente")
+            for index in indices:
+                video.set(cv2.CAP_PROP_POS_FRAMES, index)
+                success, frame = video.read()
+                if not success:
+                    break
+                yield index + 1, frame
+            return
 
+        # Só decodifica 1 a cada `stride` frames; os demais apenas avançam o
+        # decodificador com grab(), sem a conversão para BGR do retrieve()
+        stride = self._sample_stride(video.get(cv2.CAP_PROP_FPS))
+        # A amostragem usa a posição absoluta, então intervalos vizinhos
+        # escolhem os mesmos frames que uma leitura única escolheria
+        frame_count = start
+        if start:
+            video.set(cv2.CAP_PROP_POS_FRAMES, start)
+        while (end is None or frame_count < end) and video.grab():
             frame_count += 1
             if frame_count % 10 == 0:  # Atualiza a cada 10 frames
-                print(
-                    f"   → Processando frame {frame_count} | Frames válidos: {frames_processados}"
-                )
+                print(f"   → Processando frame {frame_count}")
+            if (frame_count - 1) % stride:
+                continue
 
-            image_path = os.path.join(
-                output_dir, f"{self.name_video}_{frame_count}.jpeg"
-            )
-            cv2.imwrite(image_path, frame)
+            success, frame = video.retrieve()
+            if not success:
+                break
+            yield frame_count, frame
 
-            if not self._is_frame_blurry(frame, image_path):
-                frames_processados += 1
+    def _seek_indices(self, video: cv2.VideoCapture) -> Optional[List[int]]:
+        """Índices para busca direta, ou None se a leitura sequencial for exigida."""
+        if not self.max_frames:
+            return None
+        total = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = video.get(cv2.CAP_PROP_FPS)
+        if total <= self.max_frames or fps <= 0:
+            return None
+        # Em vídeos de taxa variável a posição por índice não bate com o tempo:
+        # confere o instante do último frame antes de confiar na busca
+        video.set(cv2.CAP_PROP_POS_FRAMES, total - 1)
+        found = video.grab()
+        actual_ms = video.get(cv2.CAP_PROP_POS_MSEC)
+        video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        expected_ms = (total - 1) * 1000 / fps
+        if not found or abs(actual_ms - expected_ms) > 0.02 * expected_ms:
+            print("   ⚠ Busca por frame não confiável, lendo o vídeo em sequência")
+            return None
+        return np.linspace(0, total - 1, self.max_frames).astype(int).tolist()
 
-        print(f"\n   ✓ Concluído! Total de frames processados: {frame_count}")
-        print(f"   ✓ Frames válidos mantidos: {frames_processados}")
-        return output_dir
+    def _sample_stride(self, fps: float) -> int:
+        """Intervalo entre frames aproveitados, fixo ou derivado do FPS."""
+        if self.sample_stride:
+            return max(1, self.sample_stride)
+        return max(1, round(fps / self.target_fps)) if fps > 0 else 1
 
-    def _is_frame_blurry(self, image: MatLike, image_path: str) -> bool:
-        if image is None:
+    def _save_frame(
+        self, frame: MatLike, image_path: str
+    ) -> Optional[Tuple[float, str]]:
+        """Grava o frame se ele for nítido o suficiente, devolvendo sua nitidez e o
+        SHA-256 dos bytes gravados."""
+        if frame is None:
             print(f"   ⚠ Frame vazio detectado e descartado")
-            return True
+            return None
+        blur_score = self._blur_score(frame)
+        if blur_score <= BLUR_THRESHOLD:
+            return None
+        _, encoded = cv2.imencode(".jpeg", frame, JPEG_PARAMS)
+        data = encoded.tobytes()
+        if self._exif_bytes:
+            # Insere o segmento EXIF no JPEG ainda em memória: uma única gravação
+            # e nenhuma nova leitura do arquivo
+            with_exif = io.BytesIO()
+            piexif.insert(self._exif_bytes, data, with_exif)
+            data = with_exif.getbuffer()
+        with open(image_path, "wb") as f:
+            f.write(data)
+        # O digest sai do buffer já em memória, sem reler o arquivo depois
+        return blur_score, hashlib.sha256(data).hexdigest()
 
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        blur_score = cv2.Laplacian(gray, cv2.CV_64F).var()
+    def _blur_score(self, image: MatLike) -> float:
+        """Variância do Laplaciano: quanto maior, mais nítido o frame."""
+        height, width = image.shape[:2]
+        buffers = self._blur_buffers
+        if getattr(buffers, "shape", None) != (height, width):
+            # Destinos alocados no primeiro frame de cada thread e reaproveitados
+            # enquanto a resolução não mudar
+            if width > BLUR_SAMPLE_WIDTH:
+                sample = (round(height * BLUR_SAMPLE_WIDTH / width), BLUR_SAMPLE_WIDTH)
+                buffers.small = np.empty((*sample, 3), np.uint8)
+            else:
+                sample = (height, width)
+                buffers.small = None
+            buffers.gray = np.empty(sample, np.uint8)
+            # A resposta do Laplaciano sobre uint8 cabe em int16 (|v| <= 1020)
+            buffers.laplacian = np.empty(sample, np.int16)
+            buffers.shape = (height, width)
 
-        if blur_score <= 40:
-            return True
-
-        return False
+        # Reduz o frame antes da conversão: a ordem entre frames nítidos e
+        # borrados se mantém com bem menos pixels processados
+        if buffers.small is not None:
+            cv2.resize(
+                image,
+                buffers.gray.shape[::-1],
+                dst=buffers.small,
+                interpolation=cv2.INTER_AREA,
+            )
+            image = buffers.small
+        cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=buffers.gray)
+        cv2.Laplacian(buffers.gray, cv2.CV_16S, dst=buffers.laplacian)
+        # Desvio padrão calculado pelo OpenCV, sem a cópia temporária do .var()
+        _, std = cv2.meanStdDev(buffers.laplacian)
+        return float(std[0, 0]) ** 2
 
-    def _copy_image_metadata(self, source_path: str, destination_path: str) -> None:
+    def _load_image_metadata(self, source_path: str) -> None:
+        """Lê o EXIF da imagem de referência uma vez, para todos os frames."""
         if not os.path.exists(source_path) or os.path.isdir(source_path):
             print(f"   ⚠ Arquivo de metadados não encontrado: {source_path}")
             return
 
+        # JPEG/TIFF: bytes prontos para inserir em cada frame com o piexif
+        try:
+            self._exif_bytes = piexif.dump(piexif.load(source_path))
+            return
+        except Exception:
+            pass
+        # O piexif só lê JPEG/TIFF: outros formatos (ex.: HEIC) são lidos pelo
+        # exiv2 e convertidos uma única vez, aqui
         try:
             with ExivImage(source_path) as metadata:
-                exif_data = metadata.read_exif()
-            with ExivImage(destination_path) as output_metadata:
-                output_metadata.modify_exif(exif_data)
+                self._exif_bytes = self._exif_to_piexif(metadata.read_exif())
         except Exception as e:
-            print(f"   ⚠ Erro ao copiar metadados: {str(e)}")
+            print(f"   ⚠ Erro ao ler metadados: {str(e)}")
+
+    @staticmethod
+    def _exif_to_piexif(exif_data: dict) -> bytes:
+        """Converte o EXIF lido pelo exiv2 no segmento binário usado pelo piexif."""
+        # O exiv2 grava as tags em um JPEG mínimo em memória, de onde o piexif
+        # extrai o segmento APP1
+        _, placeholder = cv2.imencode(".jpeg", np.zeros((8, 8, 3), np.uint8))
+        with ExivImageData(placeholder.tobytes()) as image:
+            image.modify_exif(exif_data)
+            with_exif = image.get_bytes()
+        return piexif.dump(piexif.load(with_exif))
 
     def _generate_3d_model(self, frames_directory: str, processor: Processor) -> None:
         output_dir = os.path.join(
@@ -1,6 +1,7 @@
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from converter.model.entity import Converter, Pet  # Importe ambos do mesmo arquivo
-from uuid import UUID
+from object_values.status_video import StatusVideo
 
 
 def create_pet(db: Session, pet: Pet):
@@ -10,10 +11,10 @@ def create_pet(db: Session, pet: Pet):
     return pet
 
 
-def update_video_status(db: Session, video_id: UUID, status: str):
-    video = db.query(Converter).filter_by(id=video_id).first()
-    if video:
-        setattr(video, "status", status)  # Use setattr para atribuir o valor
-        db.commit()
-        db.refresh(video)
-    return video
+def update_video_status(db: Session, video_id: str, status: StatusVideo) -> bool:
+    # Um único UPDATE, sem o SELECT prévio nem o refresh depois do commit
+    result = db.execute(
+        update(Converter).where(Converter.id == video_id).values(status=status)
+    )
+    db.commit()
+    return result.rowcount > 0
@@ -1,30 +1,90 @@
+import os
+from dataclasses import replace
+
+from celery import chord
 from celery_app import celery
 from database import get_db
 from sqlalchemy.orm import Session
-from converter.services.export_img import VideoFrameExtractor
+from converter.services.export_img import SHARD_COUNT, VideoFrameExtractor
 from object_values.type_videos import TypeVideos
+from object_values.status_video import StatusVideo
 from converter.services.video_service import update_video_status
 
+# Frames no tmpfs, opcional: só se aplica às execuções em uma única tarefa, já
+# que as tarefas de um chord podem rodar em máquinas diferentes
+FRAMES_USE_TMPFS = os.environ.get("FRAMES_USE_TMPFS") == "1"
+
+
+def _extractor(video_path, pet_name, **kwargs):
+    return VideoFrameExtractor(
+        path_video=video_path,
+        path_image_metadata="src/tmp/base-sem-flash.HEIC",
+        name_video=pet_name,
+        format=TypeVideos.MOV,
+        **kwargs,
+    )
+
 
 @celery.task(name="converter.tasks.process_video")
 def process_video(video_id, video_path, pet_name):
     """Processa um vídeo para extrair frames e gerar modelo 3D"""
     print(f"Processando vídeo: {video_id}, {video_path}, {pet_name}")
     try:
+        extractor = _extractor(video_path, pet_name)
+        # Vídeos longos têm os intervalos de frames extraídos em paralelo por
+        # tarefas independentes; o modelo 3D é gerado quando todas terminam
+        ranges = extractor.frame_ranges()
+        if len(ranges) > 1:
+            # Todas as tarefas recebem o mesmo diretório de frames, em vez de
+            # cada uma resolver o seu
+            frames_path = extractor.frames_path
+            callback = generate_model.s(video_id, video_path, pet_name, frames_path)
+            chord(
+                extract_frame_range.si(video_path, pet_name, frames_path, start, end)
+                for start, end in ranges
+            )(callback.on_error(mark_video_error.si(video_id)))
+            return
 
-        extractor = VideoFrameExtractor(
-            path_video=video_path,
-            path_image_metadata="src/tmp/base-sem-flash.HEIC",
-            name_video=pet_name,
-            format=TypeVideos.MOV,
-        )
+        if FRAMES_USE_TMPFS:
+            extractor = replace(extractor, use_tmpfs=True)
         extractor.execute()
         # Atualiza o status no banco de dados para "finalizado"
         db: Session = next(get_db())
-        update_video_status(db, video_id, "finalizado")
+        update_video_status(db, video_id, StatusVideo.FINISHED)
         print(f"Vídeo processado com sucesso: {video_id}")
     except Exception as e:
         print(f"Erro ao processar vídeo {video_id}: {e}")
         db: Session = next(get_db())
-        update_video_status(db, video_id, "error")
+        update_video_status(db, video_id, StatusVideo.ERROR)
         raise
+
+
+@celery.task(name="converter.tasks.extract_frame_range")
+def extract_frame_range(video_path, pet_name, frames_path, start, end):
+    """Extrai os frames de um intervalo do vídeo, devolvendo os que foram gravados"""
+    # Os intervalos dividem os núcleos da máquina entre si
+    max_workers = max(1, (os.cpu_count() or 1) // SHARD_COUNT)
+    extractor = _extractor(
+        video_path, pet_name, frames_path=frames_path, max_workers=max_workers
+    )
+    return extractor.extract_range(start, end)
+
+
+@celery.task(name="converter.tasks.generate_model")
+def generate_model(results, video_id, video_path, pet_name, frames_path):
+    """Gera o modelo 3D depois que todos os intervalos foram extraídos"""
+    # O chord entrega os resultados na ordem dos intervalos, então os frames
+    # chegam na ordem do vídeo para o filtro de nitidez relativa
+    frames = [tuple(frame) for range_frames in results for frame in range_frames]
+    _extractor(video_path, pet_name, frames_path=frames_path).generate_model(frames)
+    db: Session = next(get_db())
+    update_video_status(db, video_id, StatusVideo.FINISHED)
+    print(f"Vídeo processado com sucesso: {video_id}")
+
+
+@celery.task(name="converter.tasks.mark_video_error")
+def mark_video_error(video_id):
+    """Marca o vídeo com erro se alguma etapa do processamento falhar"""
+    print(f"Erro ao processar vídeo {video_id}")
+    db: Session = next(get_db())
+    update_video_status(db, video_id, StatusVideo.ERROR)
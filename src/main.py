@@ -1,9 +1,11 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from converter.routes import video_routes, model_routes
 from database import create_tables
+from celery_app import celery
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -19,6 +21,18 @@ app.include_router(video_routes.router)
 app.include_router(model_routes.router)
 
 
+@app.on_event("startup")
+def open_celery_producer():
+    # Uma única conexão com o broker, reutilizada por todas as requisições
+    app.state.celery_connection = celery.connection_for_write()
+    app.state.celery_producer = app.state.celery_connection.Producer()
+
+
+@app.on_event("shutdown")
+def close_celery_producer():
+    app.state.celery_connection.release()
+
+
 @app.get("/init-db")
 async def initialize_database():
     create_tables()
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class StatusVideo(Enum):
+    PROCESSING = "processing"
+    FINISHED = "finalizado"
+    ERROR = "error"
@@ -0,0 +1,283 @@
+import hashlib
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("ijson")
+pytest.importorskip("numpy")
+pytest.importorskip("orjson")
+pytest.importorskip("requests")
+
+from converter.services import alicevision_processor
+from converter.services.alicevision_processor import (
+    ESSENTIAL_FILES,
+    PIPELINE_BINARIES,
+    AliceVisionProcessor,
+)
+
+CONTENT = bytes(range(256)) * 64
+URL = "https://example.com/cameraSensors.db"
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    """Processador sobre uma instalação falsa do AliceVision, sem downloads."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    bin_dir = tmp_path / "aliceVision" / "bin"
+    bin_dir.mkdir(parents=True)
+    for name in PIPELINE_BINARIES:
+        binary = bin_dir / name
+        binary.write_text("#!/bin/sh\n")
+        binary.chmod(0o755)
+    lib_dir = tmp_path / "aliceVision" / "lib"
+    lib_dir.mkdir()
+    (lib_dir / "libaliceVision_test.so").touch()
+    share = tmp_path / "share" / "aliceVision"
+    share.mkdir(parents=True)
+    for name in ESSENTIAL_FILES:
+        (share / name).touch()
+    input_dir = tmp_path / "frames"
+    input_dir.mkdir()
+    instance = AliceVisionProcessor(
+        input_directory=input_dir,
+        output_directory=tmp_path / "output",
+        alicevision_bin_path=bin_dir,
+        verbose=False,
+    )
+    instance.essential_cache_dir.mkdir(parents=True)
+    instance.stamps_dir.mkdir(parents=True)
+    return instance
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+        self.url = URL
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start : start + chunk_size]
+
+
+class FakeSession:
+    """Servidor com suporte a Range e ETag, registrando os cabeçalhos recebidos."""
+
+    def __init__(self, body, etag='"v1"'):
+        self.body = body
+        self.etag = etag
+        self.requests = []
+
+    def head(self, url, **kwargs):
+        return FakeResponse(200, headers={"Content-Length": str(len(self.body))})
+
+    def get(self, url, headers=None, **kwargs):
+        headers = headers or {}
+        self.requests.append(headers)
+        response_headers = {"ETag": self.etag}
+        range_header = headers.get("Range")
+        if range_header and headers.get("If-Range", self.etag) == self.etag:
+            start = int(range_header.removeprefix("bytes=").split("-")[0])
+            if start >= len(self.body):
+                response_headers["Content-Range"] = f"bytes */{len(self.body)}"
+                return FakeResponse(416, headers=response_headers)
+            return FakeResponse(206, self.body[start:], response_headers)
+        return FakeResponse(200, self.body, response_headers)
+
+
+def _use_session(monkeypatch, session):
+    monkeypatch.setattr(alicevision_processor, "_http_session", lambda: session)
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def test_fetch_resumes_partial_download(processor, monkeypatch):
+    session = FakeSession(CONTENT)
+    _use_session(monkeypatch, session)
+    cache = processor.essential_cache_dir
+    half = len(CONTENT) // 2
+    (cache / "cameraSensors.db.part").write_bytes(CONTENT[:half])
+    (cache / "cameraSensors.db.part.etag").write_text('"v1"')
+
+    processor._fetch_essential_file("cameraSensors.db", URL, _sha256(CONTENT))
+
+    assert session.requests == [{"Range": f"bytes={half}-", "If-Range": '"v1"'}]
+    assert (cache / "cameraSensors.db").read_bytes() == CONTENT
+    assert not (cache / "cameraSensors.db.part").exists()
+    assert not (cache / "cameraSensors.db.part.etag").exists()
+
+
+def test_fetch_publishes_complete_partial_on_416(processor, monkeypatch):
+    _use_session(monkeypatch, FakeSession(CONTENT))
+    cache = processor.essential_cache_dir
+    (cache / "cameraSensors.db.part").write_bytes(CONTENT)
+
+    processor._fetch_essential_file("cameraSensors.db", URL, _sha256(CONTENT))
+
+    assert (cache / "cameraSensors.db").read_bytes() == CONTENT
+
+
+def test_fetch_rejects_digest_mismatch(processor, monkeypatch):
+    _use_session(monkeypatch, FakeSession(CONTENT))
+    cache = processor.essential_cache_dir
+
+    with pytest.raises(ValueError, match="SHA-256"):
+        processor._fetch_essential_file("cameraSensors.db", URL, _sha256(b"outro"))
+
+    # Nem publicado, nem deixado para ser retomado
+    assert not (cache / "cameraSensors.db").exists()
+    assert not (cache / "cameraSensors.db.part").exists()
+    assert not (cache / "cameraSensors.db.part.etag").exists()
+
+
+def test_download_without_pinned_digest_is_refused(processor, monkeypatch):
+    session = FakeSession(CONTENT)
+    _use_session(monkeypatch, session)
+
+    assert not processor._download_essential_file("cameraSensors.db", URL, None)
+    assert session.requests == []
+    with pytest.raises(ValueError, match="SHA-256"):
+        processor._fetch_essential_file("cameraSensors.db", URL, None)
+    assert not (processor.essential_cache_dir / "cameraSensors.db").exists()
+
+
+def test_mirror_records_digest_of_first_download(processor, monkeypatch):
+    _use_session(monkeypatch, FakeSession(CONTENT))
+    cache = processor.essential_cache_dir
+    processor.essential_mirror = "https://mirror.example.com"
+
+    processor._fetch_essential_file("cameraSensors.db", URL, None)
+    assert (cache / "cameraSensors.db.sha256").read_text() == _sha256(CONTENT)
+
+    # O digest registrado passa a ser exigido em downloads seguintes
+    _use_session(monkeypatch, FakeSession(b"conteudo alterado"))
+    with pytest.raises(ValueError, match="SHA-256"):
+        processor._fetch_essential_file("cameraSensors.db", URL, None)
+
+
+def _counting_command(counter):
+    return [
+        sys.executable,
+        "-c",
+        f"open({str(counter)!r}, 'a').write('x')",
+    ]
+
+
+def test_run_cached_skips_until_inputs_change(processor, tmp_path):
+    counter = tmp_path / "runs"
+    source = tmp_path / "input.txt"
+    source.write_text("a")
+    cmd = _counting_command(counter)
+
+    def run():
+        processor._run_cached("stage", cmd, inputs=[source], outputs=[counter])
+        return len(counter.read_text())
+
+    assert run() == 1
+    assert run() == 1
+    source.write_text("ab")
+    assert run() == 2
+    # Comando diferente também invalida a etapa
+    cmd.append("--outro")
+    assert run() == 3
+
+
+def test_run_cached_uses_input_digest_for_frames(processor, tmp_path):
+    counter = tmp_path / "runs"
+    frame = processor.input_directory / "frame_1.jpeg"
+    frame.write_bytes(b"frame")
+    cmd = _counting_command(counter)
+    processor.input_digest = "digest-1"
+
+    def run():
+        processor._run_cached(
+            "stage", cmd, inputs=[processor.input_directory], outputs=[counter]
+        )
+        return len(counter.read_text())
+
+    assert run() == 1
+    # Frames regravados com o mesmo conteúdo não invalidam a etapa
+    frame.write_bytes(b"frame")
+    os.utime(frame, ns=(0, 0))
+    assert run() == 1
+    processor.input_digest = "digest-2"
+    assert run() == 2
+
+
+def test_dangling_share_link_is_relinked_to_cache(processor):
+    share = processor.alicevision_share
+    cache = processor.essential_cache_dir
+    for name in ESSENTIAL_FILES:
+        (cache / name).write_bytes(CONTENT)
+        (share / name).unlink()
+        (share / name).symlink_to(cache / "apagado" / name)
+
+    AliceVisionProcessor(
+        input_directory=processor.input_directory,
+        output_directory=processor.output_directory,
+        alicevision_bin_path=processor.alicevision_bin_path,
+        verbose=False,
+    )
+
+    for name in ESSENTIAL_FILES:
+        assert (share / name).resolve() == (cache / name).resolve()
+        assert (share / name).read_bytes() == CONTENT
+
+
+def test_run_in_ranges_partition_does_not_depend_on_workers(processor, tmp_path):
+    counter = tmp_path / "runs"
+    source = tmp_path / "input.txt"
+    source.write_text("a")
+    nb_views = 2 * alicevision_processor.RANGE_SIZE + 5
+
+    def run(max_workers):
+        processor._run_in_ranges(
+            "stage",
+            _counting_command(counter),
+            nb_views,
+            max_workers,
+            inputs=[source],
+            outputs=[counter],
+        )
+        return len(counter.read_text())
+
+    assert run(3) == 3
+    # Outra concorrência, como com menos memória livre, reaproveita os blocos
+    assert run(1) == 3
+    assert sorted(path.name for path in processor.stamps_dir.iterdir()) == [
+        "stage_0.stamp",
+        "stage_1.stamp",
+        "stage_2.stamp",
+    ]
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "sched_getaffinity") or not alicevision_processor._taskset_path(),
+    reason="sem taskset",
+)
+def test_run_command_pins_cpus_from_exec(processor, tmp_path):
+    output = tmp_path / "affinity"
+    cpu = min(os.sched_getaffinity(0))
+    cmd = [
+        sys.executable,
+        "-c",
+        f"import os; open({str(output)!r}, 'w').write(repr(sorted(os.sched_getaffinity(0))))",
+    ]
+
+    processor._run_command(cmd, cpu_set=frozenset({cpu}))
+
+    assert output.read_text() == repr([cpu])
@@ -0,0 +1,113 @@
+import hashlib
+import os
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+piexif = pytest.importorskip("piexif")
+av = pytest.importorskip("av")
+pytest.importorskip("pyexiv2")
+
+from converter.services import export_img
+from converter.services.export_img import VideoFrameExtractor
+from object_values.type_videos import TypeVideos
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEIC_REFERENCE = os.path.join(REPO_ROOT, "src", "tmp", "base-sem-flash.HEIC")
+JPEG_SAMPLE = os.path.join(REPO_ROOT, "src", "tmp", "base.JPEG")
+
+
+def _extractor(tmp_path, **kwargs):
+    return VideoFrameExtractor(
+        path_video=str(tmp_path),
+        path_image_metadata=HEIC_REFERENCE,
+        name_video="video",
+        format=TypeVideos.MOV,
+        frames_path=str(tmp_path / "frames"),
+        **kwargs,
+    )
+
+
+def _sharp_frame(seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (120, 160, 3), np.uint8)
+
+
+@pytest.mark.skipif(not os.path.exists(HEIC_REFERENCE), reason="sem a referência HEIC")
+def test_heic_reference_exif_is_inserted_in_memory(tmp_path):
+    extractor = _extractor(tmp_path)
+    extractor._load_image_metadata(HEIC_REFERENCE)
+    assert extractor._exif_bytes
+
+    image_path = str(tmp_path / "frame.jpeg")
+    saved = extractor._save_frame(_sharp_frame(), image_path)
+    assert saved is not None
+    with open(image_path, "rb") as f:
+        assert saved[1] == hashlib.sha256(f.read()).hexdigest()
+
+    exif = piexif.load(image_path)
+    assert exif["0th"][piexif.ImageIFD.Make] == b"Apple"
+    assert cv2.imread(image_path) is not None
+
+
+def _write_video(path, frames=90, fps=30):
+    """Vídeo com quadros-chave a cada 12 frames e 1 a cada 5 frames borrado."""
+    pattern = np.random.default_rng(0).integers(0, 256, (32, 44, 3), np.uint8)
+    pattern = cv2.resize(pattern, (176, 128), interpolation=cv2.INTER_NEAREST)
+    with av.open(str(path), "w") as container:
+        stream = container.add_stream("mpeg4", rate=fps)
+        stream.width, stream.height, stream.pix_fmt = 160, 120, "yuv420p"
+        stream.codec_context.gop_size = 12
+        stream.bit_rate = 4_000_000
+        for index in range(frames):
+            frame = np.roll(pattern, index, axis=1)[:120, :160].copy()
+            if index % 5 == 0:
+                frame = cv2.GaussianBlur(frame, (0, 0), 0.8)
+            image = av.VideoFrame.from_ndarray(frame, format="bgr24")
+            container.mux(stream.encode(image))
+        container.mux(stream.encode())
+
+
+@pytest.mark.parametrize("keyframes_only", [False, True])
+def test_sharded_extraction_matches_single_pass(tmp_path, monkeypatch, keyframes_only):
+    _write_video(tmp_path / "video.MOV")
+    options = dict(sample_stride=4, blur_window=2, keyframes_only=keyframes_only)
+
+    single = _extractor(tmp_path, **options)
+    single.frames_path = str(tmp_path / "single")
+    single._load_image_metadata(single.path_image_metadata)
+    with av.open(single._video_path()) as container:
+        single_frames = single._process_video_frames(container)
+
+    sharded = _extractor(tmp_path, **options)
+    sharded.frames_path = str(tmp_path / "sharded")
+    monkeypatch.setattr(export_img, "SHARDED_MIN_FRAMES", 1)
+    ranges = sharded.frame_ranges(3)
+    assert len(ranges) == 3
+    sharded_frames = [
+        frame for start, end in ranges for frame in sharded.extract_range(start, end)
+    ]
+
+    def names(frames):
+        return [
+            (os.path.basename(path), score, digest) for path, score, digest in frames
+        ]
+
+    assert single_frames
+    assert names(sharded_frames) == names(single_frames)
+    # O filtro de nitidez relativa aplicado sobre todos os intervalos juntos
+    # escolhe os mesmos frames que a leitura única
+    kept = names(single._drop_relative_blurry(single_frames))
+    assert len(kept) < len(single_frames)
+    assert names(sharded._drop_relative_blurry(sharded_frames)) == kept
+
+
+@pytest.mark.skipif(not os.path.exists(JPEG_SAMPLE), reason="sem a amostra JPEG")
+def test_blurred_sample_is_rejected(tmp_path):
+    extractor = _extractor(tmp_path)
+    sample = cv2.imread(JPEG_SAMPLE)
+
+    assert extractor._save_frame(sample, str(tmp_path / "sharp.jpeg")) is not None
+    blurred = cv2.GaussianBlur(sample, (0, 0), 2.0)
+    assert extractor._save_frame(blurred, str(tmp_path / "blurred.jpeg")) is None
+    assert not (tmp_path / "blurred.jpeg").exists()